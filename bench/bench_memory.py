@@ -0,0 +1,142 @@
+"""
+Measure the memory held by an entitlements/list response as plain dicts
+versus compact Entitlement records (fortiflex_mcp/records.py).
+
+Each representation is built in a fresh interpreter from the same synthetic
+response (bench/mock_fortiflex.py) and measured with tracemalloc:
+
+- dicts: response.json() of the whole body, as the list tools see it
+- records: the body fed to JsonArrayStream in 64 KiB chunks and turned into
+  Entitlement records one item at a time, as the entitlements index does
+
+Retained is what stays allocated once the body is parsed; peak includes the
+parse itself. Before measuring, JsonArrayStream is checked against json.loads
+on a small body split at every byte, including inside scalar items such as
+"1.5", "-2" and "3e-4". The exit status is 1 when that check fails or when the
+retained-memory ratio is below --min-ratio, so the script can gate CI.
+
+    python bench/bench_memory.py --entitlements 100000 --min-ratio 1.4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+CHUNK_SIZE = 64 * 1024
+
+
+def _payload(entitlements: int) -> bytes:
+    import mock_fortiflex
+    account = mock_fortiflex.MockFortiFlex(entitlements=entitlements, configs=40)
+    return json.dumps({"status": 0, "message": "Request processed successfully",
+                       "entitlements": list(account.entitlements.values())}).encode()
+
+
+def _parse(mode: str, payload: bytes) -> List[Any]:
+    if mode == "dicts":
+        return json.loads(payload)["entitlements"]
+    from fortiflex_mcp.records import Entitlement
+    from fortiflex_mcp.transport import JsonArrayStream
+    parser = JsonArrayStream("entitlements")
+    records = []
+    for start in range(0, len(payload), CHUNK_SIZE):
+        records.extend(Entitlement.from_dict(item) for item in parser.feed(payload[start:start + CHUNK_SIZE]))
+    return records
+
+
+def check_stream() -> List[str]:
+    """Feed a small body to JsonArrayStream split at every offset; return the mismatches."""
+    from fortiflex_mcp.transport import JsonArrayStream
+    body = ('{"status": 0, "entitlements": [1.5, {"a": 1}, -2, "x, ]", 3e-4, {"b": [1, 2.25]}, true, null,'
+            ' -0.125E+10,[3],{"c": "\u00e9 é"}, 12], "message": "ok"}').encode()
+    expected = [item for item in json.loads(body)["entitlements"] if isinstance(item, (dict, list))]
+    failures = []
+    for split in range(1, len(body)):
+        parser = JsonArrayStream("entitlements")
+        items = parser.feed(body[:split]) + parser.feed(body[split:])
+        if items != expected or not parser.done:
+            failures.append(f"split at byte {split} ({body[:split][-8:]!r}): got {items!r}")
+    parser = JsonArrayStream("entitlements")
+    items = [item for i in range(len(body)) for item in parser.feed(body[i:i + 1])]
+    if items != expected or not parser.done:
+        failures.append(f"byte-by-byte feed: got {items!r}")
+    return failures
+
+
+def measure(mode: str, entitlements: int) -> Dict[str, Any]:
+    """Run in the child interpreter: parse the payload once and report its memory."""
+    payload = _payload(entitlements)
+    if mode == "records":
+        import fortiflex_mcp.records  # noqa: F401  (imports are not part of the measurement)
+        import fortiflex_mcp.transport  # noqa: F401
+    tracemalloc.start()
+    parsed = _parse(mode, payload)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(parsed)
+    del parsed
+    # Tracing slows allocation down several times, so the parse is timed again untraced.
+    started = time.perf_counter()
+    _parse(mode, payload)
+    seconds = time.perf_counter() - started
+    return {"mode": mode, "entitlements": count, "retained_bytes": retained, "peak_bytes": peak,
+            "seconds": seconds}
+
+
+def _run_child(mode: str, entitlements: int) -> Any:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), str(BENCH_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("FORTIFLEX_API_USER", "bench-user")
+    env.setdefault("FORTIFLEX_API_PASSWORD", "bench-password")
+    output = subprocess.run([sys.executable, __file__, "--child", mode, "--entitlements", str(entitlements)],
+                            env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the memory of entitlement dicts and compact records")
+    parser.add_argument("--entitlements", type=int, default=100000, help="entitlements in the synthetic response")
+    parser.add_argument("--min-ratio", type=float, default=1.4,
+                        help="fail when dicts do not retain at least this many times the records' memory")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", choices=["check", "dicts", "records"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child == "check":
+        print(json.dumps(check_stream()))
+        return 0
+    if args.child:
+        print(json.dumps(measure(args.child, args.entitlements)))
+        return 0
+
+    failures = _run_child("check", 0)
+    for failure in failures:
+        print(f"JsonArrayStream mismatch: {failure}")
+    if failures:
+        return 1
+
+    results = {mode: _run_child(mode, args.entitlements) for mode in ("dicts", "records")}
+    ratio = results["dicts"]["retained_bytes"] / max(results["records"]["retained_bytes"], 1)
+    mb = 1024 * 1024
+    for result in results.values():
+        print(f"{result['mode']:<8} {result['entitlements']:>8} entitlements  "
+              f"retained {result['retained_bytes'] / mb:8.1f} MB "
+              f"({result['retained_bytes'] / max(result['entitlements'], 1):6.0f} B/entitlement)  "
+              f"peak {result['peak_bytes'] / mb:8.1f} MB  parse {result['seconds'] * 1000:8.1f} ms")
+    failed = ratio < args.min_ratio
+    print(f"retained ratio {ratio:.2f}x  minimum {args.min_ratio:.2f}x{'  BELOW MINIMUM' if failed else ''}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": results, "ratio": ratio, "min_ratio": args.min_ratio},
+                                              indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Measure the cold start of the FortiFlex MCP server against a time budget.
+
+Two numbers are taken, each as the median of several fresh interpreters:
+
+- import: importing fortiflex_mcp.server and registering every tool
+- first tools/list: spawning the stdio server until its tools/list response
+  arrives (initialize, initialized, tools/list), as an MCP client sees it
+
+The exit status is 1 when a median exceeds its budget, so the script can gate CI.
+
+    python bench/bench_startup.py --runs 10 --import-budget 0.5 --startup-budget 0.8
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+from fortiflex_mcp import server
+server.load_tools()
+print(time.perf_counter() - started)
+"""
+
+REQUESTS = [
+    {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+     "params": {"protocolVersion": "2025-06-18", "capabilities": {},
+                "clientInfo": {"name": "bench-startup", "version": "1"}}},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+]
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    # Keep the server from reaching a real .env file or FortiCare during the measurement.
+    env.setdefault("FORTIFLEX_API_USER", "bench-user")
+    env.setdefault("FORTIFLEX_API_PASSWORD", "bench-password")
+    return env
+
+
+def measure_import() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=_env(), cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_tools_list(command: List[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=_env(), cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    try:
+        process.stdin.write("".join(json.dumps(request) + "\n" for request in REQUESTS).encode())
+        process.stdin.flush()
+        for line in process.stdout:
+            message = json.loads(line)
+            if message.get("id") == 2:
+                return {"seconds": time.perf_counter() - started, "tools": len(message["result"]["tools"])}
+        raise RuntimeError("the server exited before answering tools/list")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure FortiFlex MCP server start-up time against a budget")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--import-budget", type=float, default=0.5, help="seconds, median import time")
+    parser.add_argument("--startup-budget", type=float, default=0.8, help="seconds, median time to tools/list")
+    parser.add_argument("--command", nargs="+", default=[sys.executable, "-m", "fortiflex_mcp"],
+                        help="server command to spawn (default: python -m fortiflex_mcp)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    imports = [measure_import() for _ in range(args.runs)]
+    startups = [measure_first_tools_list(args.command) for _ in range(args.runs)]
+    report = {
+        "import": {**_summary(imports), "budget": args.import_budget},
+        "first_tools_list": {**_summary([run["seconds"] for run in startups]), "budget": args.startup_budget,
+                             "tools": startups[0]["tools"]},
+    }
+
+    failed = False
+    for name, result in report.items():
+        over = result["median"] > result["budget"]
+        failed |= over
+        print(f"{name:<18} median {result['median'] * 1000:8.1f} ms  min {result['min'] * 1000:8.1f} ms  "
+              f"max {result['max'] * 1000:8.1f} ms  budget {result['budget'] * 1000:8.1f} ms"
+              f"{'  OVER BUDGET' if over else ''}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
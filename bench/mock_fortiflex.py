@@ -0,0 +1,261 @@
+"""
+Local stand-in for the FortiCare auth endpoint and the FortiFlex v2 API.
+
+It serves the endpoints used by the MCP server with synthetic data,
+configurable latency, error rate and account size, so the server can be
+exercised and benchmarked without reaching support.fortinet.com.
+
+    python bench/mock_fortiflex.py --port 8900 --entitlements 100000 --latency 0.05 --error-rate 0.01
+
+Point the server at it with:
+
+    FORTICARE_AUTH_URI=http://127.0.0.1:8900/api/v1/oauth/token/
+    FORTIFLEX_API_BASE_URI=http://127.0.0.1:8900/ES/api/fortiflex/v2/
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from typing import Any, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+AUTH_PATH = "/api/v1/oauth/token/"
+API_PATH = "/ES/api/fortiflex/v2/"
+PROGRAM_SN = "ELAVMS0000000001"
+ACCOUNT_ID = 1000001
+
+# (product type id, product type name, serial prefix, parameters)
+PRODUCTS = [
+    (1, "FortiGate Virtual Machine - Service Bundle", "FGVMMLTM",
+     [{"id": 1, "value": "2"}, {"id": 2, "value": "UTP"}, {"id": 10, "value": "0"}]),
+    (2, "FortiManager Virtual Machine", "FMGVMSTM",
+     [{"id": 30, "value": "10"}, {"id": 9, "value": "1"}]),
+    (7, "FortiAnalyzer Virtual Machine", "FAZVMSTM",
+     [{"id": 21, "value": "5"}, {"id": 22, "value": "0"}, {"id": 23, "value": "FAZFC247"}]),
+    (101, "FortiGate Hardware", "FGT60FTK",
+     [{"id": 27, "value": "FGT60F"}, {"id": 28, "value": "FGHWUTP"}]),
+]
+STATUSES = ["ACTIVE", "ACTIVE", "ACTIVE", "STOPPED", "PENDING", "EXPIRED"]
+
+
+def serial_number(index: int) -> str:
+    """Serial number of the index-th synthetic entitlement."""
+    return f"{PRODUCTS[index % len(PRODUCTS)][2]}{index:08d}"
+
+
+def config_index(index: int, configs: int) -> int:
+    """Index of a configuration with the same product type as the index-th entitlement."""
+    per_product = configs // len(PRODUCTS)
+    if per_product == 0:
+        return index % max(configs, 1)
+    return (index // len(PRODUCTS)) % per_product * len(PRODUCTS) + index % len(PRODUCTS)
+
+
+def config_id(index: int) -> int:
+    """ID of the index-th synthetic configuration."""
+    return 1000 + index
+
+
+class MockFortiFlex:
+    """In-memory FortiFlex account with the behaviour of the real endpoints that the server uses."""
+
+    def __init__(self, entitlements: int = 1000, configs: int = 20, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, token_ttl: int = 3600, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.tokens: set = set()
+        self.requests: Dict[str, int] = {}
+        self.configs: Dict[int, Dict[str, Any]] = {}
+        for i in range(configs):
+            type_id, type_name, _, parameters = PRODUCTS[i % len(PRODUCTS)]
+            self.configs[config_id(i)] = {
+                "id": config_id(i),
+                "programSerialNumber": PROGRAM_SN,
+                "name": f"bench-config-{i}",
+                "status": "ACTIVE",
+                "productType": {"id": type_id, "name": type_name},
+                "parameters": [dict(parameter) for parameter in parameters],
+            }
+        self.entitlements: Dict[str, Dict[str, Any]] = {}
+        for i in range(entitlements):
+            serial = serial_number(i)
+            self.entitlements[serial] = {
+                "serialNumber": serial,
+                "description": f"Bench entitlement {i}",
+                "configId": config_id(config_index(i, configs)),
+                "startDate": f"202{i % 5}-0{i % 9 + 1}-1{i % 10}T00:00:00",
+                "endDate": "2027-12-31T00:00:00",
+                "status": STATUSES[i % len(STATUSES)],
+                "token": uuid.UUID(int=self.random.getrandbits(128)).hex[:20].upper(),
+                "tokenStatus": "NOTUSED",
+                "accountId": ACCOUNT_ID,
+            }
+        self._list_payload: Optional[bytes] = None
+
+    # -- helpers -----------------------------------------------------------------------------
+
+    async def _delay_or_fail(self, name: str) -> Optional[Response]:
+        self.requests[name] = self.requests.get(name, 0) + 1
+        delay = self.latency + (self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            status = self.random.choice([429, 500, 503])
+            headers = {"Retry-After": "1"} if status == 429 else {}
+            return JSONResponse({"status": -1, "message": "Injected error", "error": status}, status, headers)
+        return None
+
+    def _unauthorized(self, request: Request) -> Optional[Response]:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token not in self.tokens:
+            return JSONResponse({"status": -1, "message": "Invalid or expired token"}, 401)
+        return None
+
+    async def _guard(self, request: Request, name: str) -> Optional[Response]:
+        return self._unauthorized(request) or await self._delay_or_fail(name)
+
+    def _entitlement(self, serial: str) -> Optional[Dict[str, Any]]:
+        return self.entitlements.get(serial)
+
+    def _not_found(self, serial: str) -> Response:
+        return JSONResponse({"status": -1, "message": f"Entitlement {serial} not found"}, 400)
+
+    # -- endpoints ---------------------------------------------------------------------------
+
+    async def auth(self, request: Request) -> Response:
+        failure = await self._delay_or_fail("oauth/token")
+        if failure is not None:
+            return failure
+        body = await request.json()
+        if not body.get("username") or not body.get("password"):
+            return JSONResponse({"status": "failed", "error": "invalid_grant"}, 401)
+        token = uuid.uuid4().hex
+        self.tokens.add(token)
+        return JSONResponse({
+            "access_token": token,
+            "expires_in": self.token_ttl,
+            "token_type": "Bearer",
+            "scope": "read write",
+            "refresh_token": uuid.uuid4().hex,
+            "message": "successfully authenticated",
+            "status": "success",
+        })
+
+    async def entitlements_list(self, request: Request) -> Response:
+        failure = await self._guard(request, "entitlements/list")
+        if failure is not None:
+            return failure
+        if self._list_payload is None:
+            self._list_payload = json.dumps({
+                "status": 0,
+                "message": "Request processed successfully",
+                "entitlements": list(self.entitlements.values()),
+            }).encode()
+        return Response(self._list_payload, media_type="application/json")
+
+    async def entitlements_points(self, request: Request) -> Response:
+        failure = await self._guard(request, "entitlements/points")
+        if failure is not None:
+            return failure
+        points = [{"serialNumber": serial, "points": round((i % 97) * 1.25, 2)}
+                  for i, serial in enumerate(self.entitlements)]
+        return JSONResponse({"status": 0, "message": "Request processed successfully", "entitlements": points})
+
+    async def _change(self, request: Request, name: str, **changes: Any) -> Response:
+        failure = await self._guard(request, name)
+        if failure is not None:
+            return failure
+        serial = (await request.json()).get("serialNumber")
+        entitlement = self._entitlement(serial)
+        if entitlement is None:
+            return self._not_found(serial)
+        entitlement.update(changes)
+        if name == "entitlements/vm/token":
+            entitlement["token"] = uuid.uuid4().hex[:20].upper()
+            entitlement["tokenStatus"] = "NOTUSED"
+        self._list_payload = None
+        return JSONResponse({"status": 0, "message": "Request processed successfully", "entitlements": [entitlement]})
+
+    async def vm_token(self, request: Request) -> Response:
+        return await self._change(request, "entitlements/vm/token")
+
+    async def reactivate(self, request: Request) -> Response:
+        return await self._change(request, "entitlements/reactivate", status="ACTIVE")
+
+    async def stop(self, request: Request) -> Response:
+        return await self._change(request, "entitlements/stop", status="STOPPED")
+
+    async def configs_list(self, request: Request) -> Response:
+        failure = await self._guard(request, "configs/list")
+        if failure is not None:
+            return failure
+        return JSONResponse({"status": 0, "message": "Request processed successfully",
+                             "configs": list(self.configs.values())})
+
+    async def configs_update(self, request: Request) -> Response:
+        failure = await self._guard(request, "configs/update")
+        if failure is not None:
+            return failure
+        body = await request.json()
+        config = self.configs.get(int(body.get("id") or 0))
+        if config is None:
+            return JSONResponse({"status": -1, "message": f"Config {body.get('id')} not found"}, 400)
+        if body.get("name"):
+            config["name"] = body["name"]
+        if body.get("parameters") is not None:
+            config["parameters"] = [{"id": int(p["id"]), "value": str(p["value"])} for p in body["parameters"]]
+        return JSONResponse({"status": 0, "message": "Request processed successfully", "configs": config})
+
+    async def health(self, request: Request) -> Response:
+        return JSONResponse({"status": "ok", "entitlements": len(self.entitlements), "requests": self.requests})
+
+
+def create_app(**options: Any) -> Starlette:
+    """Build the mock ASGI app; options are passed to MockFortiFlex."""
+    mock = MockFortiFlex(**options)
+    routes: List[Route] = [
+        Route(AUTH_PATH, mock.auth, methods=["POST"]),
+        Route(API_PATH + "entitlements/list", mock.entitlements_list, methods=["POST"]),
+        Route(API_PATH + "entitlements/points", mock.entitlements_points, methods=["POST"]),
+        Route(API_PATH + "entitlements/vm/token", mock.vm_token, methods=["POST"]),
+        Route(API_PATH + "entitlements/reactivate", mock.reactivate, methods=["POST"]),
+        Route(API_PATH + "entitlements/stop", mock.stop, methods=["POST"]),
+        Route(API_PATH + "configs/list", mock.configs_list, methods=["POST"]),
+        Route(API_PATH + "configs/update", mock.configs_update, methods=["POST"]),
+        Route("/health", mock.health, methods=["GET"]),
+    ]
+    app = Starlette(routes=routes)
+    app.state.mock = mock
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local FortiFlex API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--entitlements", type=int, default=1000, help="number of entitlements (up to 100000+)")
+    parser.add_argument("--configs", type=int, default=20, help="number of configurations")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- random latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 429/5xx")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="expires_in of issued tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(entitlements=args.entitlements, configs=args.configs, latency=args.latency,
+                     jitter=args.jitter, error_rate=args.error_rate, token_ttl=args.token_ttl, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark every tool of the FortiFlex MCP server against the local FortiFlex stand-in.
+
+The mock API (bench/mock_fortiflex.py) runs in a subprocess; the MCP server
+runs in this process and every tool is called through an MCP client session
+over in-memory streams, so JSON-RPC framing and result serialization are
+included in the numbers. For each tool the suite reports throughput and
+p50/p99 latency; peak RSS is reported for the server process.
+
+    python bench/run_bench.py --entitlements 100000 --calls 50 --concurrency 10 --latency 0.02
+    python bench/run_bench.py --tools entitlements_get entitlements_query --json bench_output.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import mock_fortiflex  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def start_mock(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    command = [
+        sys.executable, str(BENCH_DIR / "mock_fortiflex.py"), "--port", str(port),
+        "--entitlements", str(args.entitlements), "--configs", str(args.configs),
+        "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+    ]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("mock FortiFlex API exited during start-up")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("mock FortiFlex API did not start")
+
+
+def configure_server_env(args: argparse.Namespace, port: int) -> None:
+    """Point the server at the mock before it is imported, since it reads its settings at import time."""
+    base = f"http://127.0.0.1:{port}"
+    tenants_file = os.path.join(tempfile.mkdtemp(prefix="fortiflex-bench-tenants-"), "tenants.json")
+    with open(tenants_file, "w") as f:
+        json.dump({"tenants": [{"name": f"bench-tenant-{i}", "api_user": f"bench-user-{i}", "api_password": "bench-password",
+                                "program_sn": mock_fortiflex.PROGRAM_SN} for i in (1, 2)]}, f)
+    os.environ.update({
+        "FORTICARE_AUTH_URI": base + mock_fortiflex.AUTH_PATH,
+        "FORTIFLEX_API_BASE_URI": base + mock_fortiflex.API_PATH,
+        "FORTIFLEX_API_USER": "bench-user",
+        "FORTIFLEX_API_PASSWORD": "bench-password",
+        "FORTIFLEX_PROGRAM_SN": mock_fortiflex.PROGRAM_SN,
+        "FORTIFLEX_ACCOUNT_ID": str(mock_fortiflex.ACCOUNT_ID),
+        "FORTIFLEX_API_RATE_LIMIT": str(args.api_rate_limit),
+        "FORTIFLEX_AUTH_RATE_LIMIT": "0",
+        "FORTIFLEX_RETRY_BACKOFF_BASE": "0.05",
+        "FORTIFLEX_SNAPSHOT_DIR": tempfile.mkdtemp(prefix="fortiflex-bench-snapshots-"),
+        "FORTIFLEX_JOBS_DB": os.path.join(tempfile.mkdtemp(prefix="fortiflex-bench-jobs-"), "jobs.sqlite3"),
+        "FORTIFLEX_TENANTS_FILE": tenants_file,
+    })
+
+
+def scenarios(args: argparse.Namespace, last: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Tool calls to benchmark, in order: read paths first, then writes that invalidate caches.
+    last holds the latest result of each scenario marked "keep", for scenarios that need an ID from it.
+    """
+    rng = random.Random(args.seed)
+
+    def serial() -> str:
+        return mock_fortiflex.serial_number(rng.randrange(args.entitlements))
+
+    def config() -> int:
+        return mock_fortiflex.config_id(rng.randrange(args.configs))
+
+    def serials() -> List[str]:
+        return [serial() for _ in range(args.batch_size)]
+
+    def desired() -> str:
+        cpu = str(rng.choice([1, 2, 4]))
+        return json.dumps({"configs": [{"id": mock_fortiflex.config_id(0), "name": "bench-config-0",
+                                        "parameters": {"FGT_VM_BUNDLE_CPU_SIZE": cpu, "FGT_VM_BUNDLE_SVC_PKG": "UTP"}}]})
+
+    def last_page_cursor() -> str:
+        # Cursors are "<snapshot ID>:<position>"; jump to the last page of the first page's snapshot.
+        snapshot_id = last["entitlements_list_page"]["next_cursor"].partition(":")[0]
+        return f"{snapshot_id}:{max(args.entitlements - 100, 0)}"
+
+    heavy = args.heavy_calls
+    token = {"access_token": ""}
+    return [
+        {"tool": "generate_token", "args": lambda: {}},
+        {"tool": "config_parameters", "args": lambda: {"product_type": "FGT_VM_BUNDLE"}},
+        {"tool": "config_list", "args": lambda: {**token, "program_sn": mock_fortiflex.PROGRAM_SN}},
+        {"tool": "config_plan", "args": lambda: {**token, "desired": desired()}},
+        {"tool": "entitlements_list", "args": lambda: dict(token), "calls": heavy},
+        {"tool": "entitlements_list", "label": "entitlements_list (refresh)",
+         "args": lambda: {**token, "refresh": True}, "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_list", "label": "entitlements_list (3 tenants, refresh)",
+         "args": lambda: {**token, "refresh": True, "tenant": "all"}, "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_list_page", "label": "entitlements_list_page (first page)",
+         "args": lambda: {**token, "page_size": 100, "fields": ["serialNumber", "status", "configId"]}, "keep": True},
+        {"tool": "entitlements_list_page", "label": "entitlements_list_page (last page)",
+         "args": lambda: {**token, "cursor": last_page_cursor(), "page_size": 100}, "calls": heavy},
+        {"tool": "entitlements_index_refresh", "args": lambda: dict(token), "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_get", "args": lambda: {**token, "serial_number": serial()}},
+        {"tool": "entitlements_query", "args": lambda: {**token, "config_id": str(config()), "status": "STOPPED"}},
+        {"tool": "entitlements_aggregate", "args": lambda: {**token, "group_by": ["productType", "status"]}},
+        {"tool": "entitlements_aggregate", "label": "entitlements_aggregate (points)",
+         "args": lambda: {**token, "group_by": ["configId"], "include_points": True}, "calls": heavy},
+        {"tool": "entitlements_changes", "args": lambda: dict(token), "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_watch", "args": lambda: {**token, "interval": 1, "duration": 0},
+         "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_vm_token", "args": lambda: {**token, "serial_number": serial()}},
+        {"tool": "entitlements_stop", "args": lambda: {**token, "serial_number": serial()}},
+        {"tool": "entitlements_reactivate", "args": lambda: {**token, "serial_number": serial()}},
+        {"tool": "entitlements_stop_batch", "args": lambda: {**token, "serial_numbers": serials()},
+         "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_reactivate_batch", "args": lambda: {**token, "serial_numbers": serials()},
+         "calls": heavy, "concurrency": 1},
+        {"tool": "entitlements_vm_token_batch", "args": lambda: {**token, "serial_numbers": serials()},
+         "calls": heavy, "concurrency": 1},
+        {"tool": "update_config", "args": lambda: {**token, "config_id": mock_fortiflex.config_id(0),
+                                                   "name": "bench-config-0",
+                                                   "parameters": [{"id": 1, "value": str(rng.choice([1, 2, 4]))},
+                                                                  {"id": 2, "value": "UTP"}]}},
+        {"tool": "config_apply", "args": lambda: {**token, "desired": desired()}, "concurrency": 1},
+        {"tool": "job_submit", "args": lambda: {**token, "operation": "stop", "serial_numbers": serials()},
+         "calls": heavy, "concurrency": 1, "keep": True},
+        {"tool": "job_status", "args": lambda: {"job_id": last["job_submit"]["job_id"]}},
+        {"tool": "job_list", "args": lambda: {"limit": 20}},
+        {"tool": "job_cancel", "args": lambda: {"job_id": last["job_submit"]["job_id"]}, "calls": heavy,
+         "concurrency": 1},
+        {"tool": "request_stats", "args": lambda: {}},
+        {"tool": "cache_stats", "args": lambda: {}},
+        {"tool": "server_stats", "args": lambda: {}},
+    ]
+
+
+async def run_scenario(session, scenario: Dict[str, Any], calls: int, concurrency: int,
+                       last: Dict[str, Any]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[str] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    make_args: Callable[[], Dict[str, Any]] = scenario["args"]
+
+    async def call() -> None:
+        async with semaphore:
+            arguments = make_args()
+            started = time.perf_counter()
+            result = await session.call_tool(scenario["tool"], arguments)
+            latencies.append(time.perf_counter() - started)
+            if result.isError:
+                errors.append(result.content[0].text if result.content else "error")
+            elif scenario.get("keep"):
+                last[scenario["tool"]] = json.loads(result.content[0].text)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    return {
+        "tool": scenario.get("label", scenario["tool"]),
+        "calls": calls,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0][:200] if errors else None,
+        "throughput": calls / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from fortiflex_mcp import server
+
+    # Per-request INFO logs from httpx and the MCP server would dominate the output.
+    for name in ("httpx", "mcp"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    results = []
+    mcp = server.load_tools()
+    await server.startup_http_clients()
+    try:
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            registered = {tool.name for tool in (await session.list_tools()).tools}
+            covered = set()
+            last: Dict[str, Any] = {}
+            for scenario in scenarios(args, last):
+                if args.tools and scenario["tool"] not in args.tools:
+                    continue
+                covered.add(scenario["tool"])
+                calls = scenario.get("calls", args.calls)
+                concurrency = min(scenario.get("concurrency", args.concurrency), calls)
+                result = await run_scenario(session, scenario, calls, concurrency, last)
+                results.append(result)
+                print(_format_row(result), flush=True)
+    finally:
+        await server.shutdown_shared_state()
+
+    missing = sorted(registered - covered) if not args.tools else []
+    if missing:
+        print(f"\nTools without a benchmark scenario: {', '.join(missing)}")
+    return {
+        "settings": {name: value for name, value in vars(args).items() if name != "json"},
+        "results": results,
+        "peak_rss_mb": _peak_rss_mb(),
+        "uncovered_tools": missing,
+    }
+
+
+HEADER = f"{'tool':<40} {'calls':>6} {'conc':>5} {'err':>5} {'calls/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}"
+
+
+def _format_row(result: Dict[str, Any]) -> str:
+    return (f"{result['tool']:<40} {result['calls']:>6} {result['concurrency']:>5} {result['errors']:>5} "
+            f"{result['throughput']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} "
+            f"{result['peak_rss_mb']:>8.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the FortiFlex MCP tools against a local mock API")
+    parser.add_argument("--entitlements", type=int, default=10000, help="entitlements in the mock account")
+    parser.add_argument("--configs", type=int, default=40, help="configurations in the mock account")
+    parser.add_argument("--latency", type=float, default=0.01, help="mock latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mock latency jitter, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock requests failing 429/5xx")
+    parser.add_argument("--calls", type=int, default=50, help="calls per light tool")
+    parser.add_argument("--heavy-calls", type=int, default=5, help="calls per full-list or batch tool")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent calls per tool")
+    parser.add_argument("--batch-size", type=int, default=50, help="serial numbers per batch tool call")
+    parser.add_argument("--api-rate-limit", type=float, default=0, help="FORTIFLEX_API_RATE_LIMIT (0 = off)")
+    parser.add_argument("--tools", nargs="*", help="only benchmark these tools")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    mock = start_mock(args, port)
+    try:
+        configure_server_env(args, port)
+        print(HEADER)
+        report = asyncio.run(run(args))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    print(f"\nPeak RSS: {report['peak_rss_mb']:.1f} MB")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return 1 if any(result["errors"] for result in report["results"]) and not args.error_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+FortiFlex MCP server.
+
+Submodules are loaded on first use: importing the package does not import the
+MCP SDK, so e.g. fortiflex_mcp.catalog can be used on its own.
+
+    python -m fortiflex_mcp [--transport stdio|http|sse] [--host HOST] [--port PORT] [--workers N]
+"""
+import importlib
+
+__all__ = ["main", "create_http_app", "load_tools"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return getattr(importlib.import_module(".server", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
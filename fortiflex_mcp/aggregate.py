@@ -0,0 +1,78 @@
+"""
+Server-side aggregation of entitlement counts and points usage.
+"""
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from .cache import response_cache
+from .records import Entitlement
+from .settings import COMMON_HEADERS, FORTIFLEX_API_BASE_URI, account_id, program_sn
+from .transport import make_request
+
+
+AGGREGATE_KEYS = ("configId", "productType", "status", "startMonth", "endMonth")
+
+
+def aggregate_entitlements(records: List[Entitlement], group_by: List[str], config_types: Dict[str, str],
+                           points: Optional[Dict[str, float]] = None, start_date: str = "",
+                           end_date: str = "") -> Dict[str, Any]:
+    """
+    Count entitlements (and sum their points) per group in a single columnar pass.
+
+    Each group_by key is turned into one column over all records, the date
+    filter into a boolean mask, and the groups are the distinct rows of the
+    zipped key columns.
+    """
+    starts = [record.start_day for record in records]
+    ends = [record.end_day for record in records]
+    columns = {
+        "configId": lambda: [str(record.configId) for record in records],
+        "productType": lambda: [config_types.get(str(record.configId), "UNKNOWN") for record in records],
+        "status": lambda: [record.status or "UNKNOWN" for record in records],
+        "startMonth": lambda: [start[:7] for start in starts],
+        "endMonth": lambda: [end[:7] for end in ends],
+    }
+    key_columns = [columns[key]() for key in group_by]
+    # An entitlement is in range when [startDate, endDate] overlaps [start_date, end_date].
+    mask = [(not start_date or not end or end >= start_date) and (not end_date or not start or start <= end_date)
+            for start, end in zip(starts, ends)]
+    point_column = ([points.get(record.serialNumber, 0.0) for record in records]
+                    if points is not None else None)
+
+    counts: Dict[Tuple[str, ...], int] = {}
+    sums: Dict[Tuple[str, ...], float] = {}
+    for i, key in enumerate(zip(*key_columns) if key_columns else ((),) * len(records)):
+        if not mask[i]:
+            continue
+        counts[key] = counts.get(key, 0) + 1
+        if point_column is not None:
+            sums[key] = sums.get(key, 0.0) + point_column[i]
+
+    groups = []
+    for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        group: Dict[str, Any] = dict(zip(group_by, key))
+        group["count"] = count
+        if point_column is not None:
+            group["points"] = round(sums[key], 2)
+        groups.append(group)
+    total: Dict[str, Any] = {"count": sum(counts.values())}
+    if point_column is not None:
+        total["points"] = round(sum(sums.values()), 2)
+    return {"total": total, "groups": groups}
+
+
+async def entitlement_points(access_token: str, start_date: str, end_date: str) -> Dict[str, float]:
+    """Points consumed per serial number between start_date and end_date (default: this month so far)."""
+    today = time.strftime("%Y-%m-%d")
+    body = {
+        "accountId": account_id,
+        "programSerialNumber": program_sn,
+        "startDate": start_date or today[:8] + "01",
+        "endDate": end_date or today,
+    }
+    uri = FORTIFLEX_API_BASE_URI + "entitlements/points"
+    headers = COMMON_HEADERS.copy()
+    response = await response_cache.get_or_fetch(
+        "entitlements/points", body, lambda: make_request(uri, body, headers, access_token=access_token))
+    return {item.get("serialNumber"): float(item.get("points") or 0.0)
+            for item in response.get("entitlements") or []}
@@ -0,0 +1,12 @@
+"""
+The FastMCP instance that every tool module registers with.
+"""
+from mcp.server import FastMCP
+
+mcp = FastMCP("mcp-fortiflex")
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request):
+    from starlette.responses import JSONResponse
+    return JSONResponse({"status": "ok"})
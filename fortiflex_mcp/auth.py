@@ -0,0 +1,121 @@
+"""
+FortiCare OAuth token cache shared by every tool.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from . import tenants, transport
+from .metrics import metrics, current_tool
+from .settings import (COMMON_HEADERS, FORTICARE_AUTH_URI, TOKEN_REFRESH_MARGIN, TOKEN_DEFAULT_EXPIRES_IN,
+                       api_user, api_password)
+
+
+class TokenManager:
+    """
+    Caches the FortiCare OAuth token for one API user.
+
+    The token is refreshed in the background shortly before it expires, and
+    concurrent callers that find no valid token share a single in-flight
+    request to the auth endpoint.
+    """
+
+    def __init__(self, api_user: Optional[str], api_password: Optional[str],
+                 auth_uri: str = FORTICARE_AUTH_URI, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.api_user = api_user
+        self.api_password = api_password
+        self.auth_uri = auth_uri
+        self.refresh_margin = refresh_margin
+        self._token_response: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def access_token(self) -> Optional[str]:
+        if self._token_response is None or time.monotonic() >= self._expires_at:
+            return None
+        return self._token_response.get("access_token")
+
+    def token_response(self) -> Dict[str, Any]:
+        """Return the cached token response with expires_in set to the remaining lifetime."""
+        response = dict(self._token_response or {})
+        response["expires_in"] = max(int(self._expires_at - time.monotonic()), 0)
+        return response
+
+    async def get_token(self, force_refresh: bool = False) -> str:
+        """Return a valid access token, requesting a new one only when needed."""
+        if not force_refresh:
+            token = self.access_token
+            if token:
+                return token
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    def invalidate(self, token: str) -> None:
+        """Drop the cached token if it is the one the API just rejected."""
+        if self._token_response is not None and self._token_response.get("access_token") == token:
+            self._token_response = None
+            self._expires_at = 0.0
+
+    async def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _fetch(self) -> str:
+        logging.debug("--> Requesting a new FortiCare token...")
+        body = {
+            'username': self.api_user,
+            'password': self.api_password,
+            'client_id': 'flexvm',
+            'grant_type': 'password'
+        }
+        response = await transport.make_request(self.auth_uri, body, COMMON_HEADERS.copy())
+        token = response.get("access_token")
+        if not token:
+            raise RuntimeError(f"FortiCare did not return an access token: {response.get('message') or response}")
+
+        expires_in = float(response.get("expires_in") or TOKEN_DEFAULT_EXPIRES_IN)
+        self._token_response = response
+        self._expires_at = time.monotonic() + expires_in
+        self._schedule_refresh(max(expires_in - self.refresh_margin, expires_in / 2))
+        return token
+
+    def _schedule_refresh(self, delay: float) -> None:
+        # _refresh_task is only set while the refresh is still sleeping, so this never cancels
+        # a refresh that is waiting for the very fetch that reschedules it.
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        self._refresh_task = asyncio.ensure_future(self._refresh_later(delay))
+
+    async def _refresh_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._refresh_task = None
+        try:
+            await self.get_token(force_refresh=True)
+        except Exception as e:
+            # The cached token stays usable until it expires; the next call retries.
+            logging.warning(f"Background token refresh failed: {str(e)}")
+
+
+token_manager = TokenManager(api_user, api_password)
+
+
+def active_token_manager() -> TokenManager:
+    """The token cache of the tenant the current call runs for (see tenants.current_tenant)."""
+    tenant = tenants.current_tenant.get()
+    return tenant.token_manager if tenant is not None else token_manager
+
+
+async def timed_get_token() -> str:
+    """active_token_manager().get_token() with the wait recorded against the current tool."""
+    started = time.perf_counter()
+    try:
+        return await active_token_manager().get_token()
+    finally:
+        tool = current_tool.get()
+        if tool:
+            metrics.observe_auth(tool, time.perf_counter() - started)
@@ -0,0 +1,144 @@
+"""
+Response cache for the read-only list endpoints, and the snapshots paged lists are served from.
+"""
+import asyncio
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from .index import entitlement_index
+from .records import Entitlement
+from .tenants import current_tenant
+from .settings import CACHE_TTLS, CACHE_MAX_ENTRIES, PAGE_SNAPSHOT_TTL, PAGE_SNAPSHOT_MAX
+
+
+class ResponseCache:
+    """
+    Async-safe LRU cache for read-only endpoints, keyed by endpoint and request body.
+
+    Entries expire after the endpoint's TTL. Identical calls that arrive while
+    a request is in flight wait for that request instead of sending their own,
+    and invalidate() drops every entry of an endpoint after a write.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = CACHE_TTLS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "invalidations": 0}
+
+    async def get_or_fetch(self, endpoint: str, body: Dict[str, Any],
+                           fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return await fetch()
+        tenant = current_tenant.get()
+        key = (endpoint, tenant.name if tenant is not None else "", json.dumps(body, sort_keys=True, default=str))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        self.stats["misses"] += 1
+        generation = self._generations.get(endpoint, 0)
+        future = asyncio.ensure_future(fetch())
+        self._inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        # Do not store a response that was requested before a write invalidated the endpoint.
+        if self._generations.get(endpoint, 0) == generation:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return result
+
+    def invalidate(self, endpoint: str) -> None:
+        self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+        for key in [key for key in self._entries if key[0] == endpoint]:
+            del self._entries[key]
+        self._inflight = {key: future for key, future in self._inflight.items() if key[0] != endpoint}
+        self.stats["invalidations"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "hit_ratio": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttls": self.ttls,
+        }
+
+
+response_cache = ResponseCache()
+
+
+class PageSnapshots:
+    """
+    Frozen entitlement lists that entitlements_list_page pages through.
+
+    The first page stores the list it was cut from under a random ID, and
+    each cursor names that ID and a position in it, so later pages neither
+    download the list again nor shift when entitlements are added or removed
+    meanwhile. A snapshot expires PAGE_SNAPSHOT_TTL seconds after its last
+    page, and only the PAGE_SNAPSHOT_MAX most recently used ones are kept.
+    """
+
+    def __init__(self, ttl: float = PAGE_SNAPSHOT_TTL, max_entries: int = PAGE_SNAPSHOT_MAX):
+        self.ttl = ttl
+        self.max_entries = max(max_entries, 1)
+        self._entries: "OrderedDict[str, Tuple[float, List[Entitlement]]]" = OrderedDict()
+
+    def add(self, records: List[Entitlement]) -> str:
+        self._expire()
+        snapshot_id = secrets.token_hex(8)
+        self._entries[snapshot_id] = (time.monotonic() + self.ttl, records)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return snapshot_id
+
+    def get(self, snapshot_id: str) -> Optional[List[Entitlement]]:
+        self._expire()
+        entry = self._entries.get(snapshot_id)
+        if entry is None:
+            return None
+        self._entries[snapshot_id] = (time.monotonic() + self.ttl, entry[1])
+        self._entries.move_to_end(snapshot_id)
+        return entry[1]
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for snapshot_id in [sid for sid, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[snapshot_id]
+
+    def summary(self) -> Dict[str, Any]:
+        self._expire()
+        return {"snapshots": len(self._entries),
+                "entitlements": sum(len(records) for _, records in self._entries.values()),
+                "max_snapshots": self.max_entries, "ttl": self.ttl}
+
+
+page_snapshots = PageSnapshots()
+
+
+def entitlements_changed() -> None:
+    """Forget cached entitlement data after a lifecycle write."""
+    response_cache.invalidate("entitlements/list")
+    entitlement_index.mark_stale()
@@ -0,0 +1,473 @@
+"""
+FortiFlex product types and the valid values of every configuration parameter.
+
+Only the configuration tools need this module, so it is imported on first use.
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, FrozenSet
+
+# Product Types
+FGT_VM_BUNDLE = 1                           # FortiGate Virtual Machine - Service Bundle
+FMG_VM = 2                                  # FortiManager Virtual Machine
+FWB_VM = 3                                  # FortiWeb Virtual Machine - Service Bundle
+FGT_VM_LCS = 4                              # FortiGate Virtual Machine - A La Carte Services
+FC_EMS_OP = 5                               # FortiClient EMS On-Prem
+FAZ_VM = 7                                  # FortiAnalyzer Virtual Machine
+FPC_VM = 8                                  # FortiPortal Virtual Machine
+FAD_VM = 9                                  # FortiADC Virtual Machine
+FGT_HW = 101                                # FortiGate Hardware
+FWBC_PRIVATE = 202                          # FortiWeb Cloud - Private
+FWBC_PUBLIC = 203                           # FortiWeb Cloud - Public
+FC_EMS_CLOUD = 204                          # FortiClient EMS Cloud
+
+###########################################
+# FortiGate VM - Service Bundle           #
+###########################################
+FGT_VM_BUNDLE_CPU_SIZE = 1                  # 1 - 96 inclusive
+FGT_VM_BUNDLE_SVC_PKG = 2                   # "FC" = FortiCare 
+                                            # "UTP" = UTP
+                                            # "ENT" = Enterprise 
+                                            # "ATP" = ATP
+                                            # "UTM" = UTM (no longer available)
+FGT_VM_BUNDLE_VDOM_NUM = 10                 # 0 - 500 inclusive
+FGT_VM_BUNDLE_FORITI_GUARD_SERVICES = 43    # "FGTAVDB" = Advanced Malware Protection
+                                            # "FGTFAIS" =  AI-Based In-line Sandbox
+                                            # "FGTISSS" = FortiGuard OT Security Service
+                                            # "FGTDLDB" = FortiGuard DLP
+                                            # "FGTFGSA" = FortiGuard Attack Surface Security Service
+                                            # "FGTFCSS" = FortiConverter Service
+FGT_VM_BUNDLE_CLOUD_SERVICES = 44           # "FGTFAMS" = FortiGate Cloud Management
+                                            # "FGTSWNM" = SD-WAN Underlay
+                                            # "FGTSOCA" = SOCaaS
+                                            # "FGTFAZC" = FortiAnalyzer Cloud
+                                            # "FGTSWOS" = Cloud-based Overlay-as-a-Service
+                                            # "FGTFSPA" = SD-WAN Connector for FortiSASE
+FGT_VM_BUNDLE_SUPPORT_SERVICE = 45          # "FGTFCELU" = FC Elite Upgrade
+
+###########################################
+# FortiManager VM                         #
+###########################################
+FMG_VM_MANAGED_DEV = 30                     # 1 - 100000 inclusive
+FMG_VM_ADOM_NUM = 9                         # 1 - 100000 inclusive
+
+###########################################
+# FortiWeb VMe - Service Bundle           #
+###########################################
+FWB_VM_CPU_SIZE = 4                         # 1, 2, 4, 8, 16
+FWB_VM_SVC_PKG = 5                          # "FWBSTD" = Standard
+                                            # "FWBADV" = Advanced
+
+###########################################
+# FortiGate VM - A La Carte               #
+###########################################
+FGT_VM_LCS_CPU_SIZE = 6                     # 1 - 96 inclusive
+FGT_VM_LCS_FORTIGUARD_SERVICES = 7          # "IPS" = Intrusion Prevention
+                                            # "AVDB" = Advanced Malware
+                                            # "FURLDNS" = Web, DNS & Video Filtering
+                                            # "FGSA" = Security Rating
+                                            # "DLDB" = DLP
+                                            # "FAIS" = AI-Based InLine Sandbox
+                                            # "FURL" = Web & Video Filtering (no longer available)
+                                            # "IOTH" = IOT Detection (no longer available)
+                                            # "ISSS" = Industrial Security (no longer available)
+FGT_VM_LCS_SUPPORT_SERVICE = 8              # "FC247" = FortiCare Premium
+                                            # "ASET" = FortiCare Elite
+FGT_VM_LCS_VDOM_NUM = 11                    # 1 - 500 inclusive
+FGT_VM_LCS_CLOUD_SERVICES = 12              # "FAMS" = FortiGate Cloud
+                                            # "SWNM" = SD-WAN Cloud
+                                            # "AFAC" = FortiAnalyzer Cloud with SOCaaS
+                                            # "FAZC" = FortiAnalyzer Cloud
+                                            # "FMGC" = FortiManager Cloud  (no longer available)
+
+###########################################
+# FortiClient EMS On-Prem                 #
+###########################################
+FC_EMS_OP_ZTNA_NUM = 13                     # 0 - 25000 inclusive
+FC_EMS_OP_EPP_ZTNA_NUM = 14                 # 0 - 25000 inclusive
+FC_EMS_OP_CHROMEBOOK = 15                   # 0 - 25000 inclusive
+FC_EMS_OP_SUPPORT_SERVICE = 16              # "FCTFC247" = FortiCare Premium
+FC_EMS_OP_ADDOS = 36                        # "BPS" = FortiCare Best Practice
+
+###########################################
+# FortiAnalyzer VM                        #
+###########################################
+FAZ_VM_DAILY_STORAGE = 21                   # 5 - 8300 inclusive
+FAZ_VM_ADOM_NUM = 22                        # 0 - 1200 inclusive
+FAZ_VM_SUPPORT_SERVICE = 23                 # "FAZFC247" = FortiCare Premium
+
+###########################################
+# FortiPortal VM                          #
+###########################################
+FPC_VM_MANAGED_DEV = 24                     # 0 - 100000 inclusive
+
+###########################################
+# FortiADC VM                             #
+###########################################
+FAD_VM_CPU_SIZE = 25                        # 1, 2, 4, 8, 16, 32
+FAD_VM_SERVICE_PACKAGE = 26                 # "FDVSTD" = Standard
+                                            # "FDVADV" = Advanced
+                                            # "FDVFC247" = FortiCare Premium
+
+###########################################
+# FortiGate Hardware                      #
+###########################################
+FGT_HW_DEVICE_MODEL = 27                    # "FGT40F" = FortiGate 40F
+                                            # "FWF40F" = FortiWifi 40F
+                                            # "FGT60E" = FortiGate 60E
+                                            # "FGT60F" = FortiGate 60F
+                                            # "FWF60F" = FortiWifi 60F
+                                            # "FGR60F" = FortiGateRugged 60F
+                                            # "FGT61F" = FortiGate 61F
+                                            # "FGT70F" = FortiGate 70F
+                                            # "FR70FB" = FortiGateRugged 70F
+                                            # "FGT80F" = FortiGate 80F
+                                            # "FGT81F" = FortiGate 81F
+                                            # "FG100E" = FortiGate 100E
+                                            # "FG100F" = FortiGate 100F
+                                            # "FG101E" = FortiGate 101E
+                                            # "FG101F" = FortiGate 101F
+                                            # "FG200E" = FortiGate 200E
+                                            # "FG200F" = FortiGate 200F
+                                            # "FG201F" = FortiGate 201F
+                                            # "FG4H0F" = FortiGate 400F
+                                            # "FG4H1F" = FortiGate 401F
+                                            # "FG6H0F" = FortiGate 600F
+                                            # "FG1K0F" = FortiGate 1000F
+                                            # "FG180F" = FortiGate 1800F
+                                            # "F2K60F " = FortiGate 2600F
+                                            # "FG3K0F" = FortiGate 3000F
+                                            # "FG3K1F" = FortiGate 3001F
+                                            # "FG3K2F" = FortiGate 3200F
+                                            # "FG40FI" = FortiGate 40F-3G4G
+                                            # "FW40FI" = FortiWifi 40F-3G4G
+                                            # "FWF61F" = FortiWifi 61F
+                                            # "FR60FI" = FortiGateRugged 60F 3G4G
+                                            # "FGT71F" = FortiGate 71F
+                                            # "FG80FP" = FortiGate 80F-PoE
+                                            # "FG80FB" = FortiGate 80F-Bypass
+                                            # "FG80FD" = FortiGate 80F DSL
+                                            # "FWF80F" = FortiWiFi 80F-2R
+                                            # "FW80FS" = FortiWiFi 80F-2R-3G4G-DSL
+                                            # "FWF81F" = FortiWiFi 81F 2R
+                                            # "FW81FS" = FortiWiFi 81F-2R-3G4G-DSL
+                                            # "FW81FD" = FortiWiFi 81F-2R-3G4G-PoE
+                                            # "FW81FP" = FortiWiFi 81F 2R POE
+                                            # "FG81FP" = FortiGate 81F-PoE
+                                            # "FGT90G" = FortiGate 90G
+                                            # "FGT91G" = FortiGate 91G
+                                            # "FG201E" = FortiGate 201E
+                                            # "FG4H0E" = FortiGate 400E
+                                            # "FG4HBE" = FortiGate 400E BYPASS
+                                            # "FG4H1E" = FortiGate 401E
+                                            # "FD4H1E" = FortiGate 401E DC
+                                            # "FG6H0E" = FortiGate 600E
+                                            # "FG6H1E" = FortiGate 601E
+                                            # "FG6H1F" = FortiGate 601F
+                                            # "FG9H0G" = FortiGate 900G
+                                            # "FG9H1G" = FortiGate 901G
+                                            # "FG1K1F" = FortiGate 1001F
+                                            # "FG181F" = FortiGate 1801F
+                                            # "FG3K7F" = FortiGate 3700F
+                                            # "FG39E6" = FortiGate 3960E
+                                            # "FG441F" = FortiGate 4401F
+FGT_HW_SERVICE_PACKAGE = 28                 # "FGHWFC247" = FortiCare Premium
+                                            # "FGHWFCEL" = FortiCare Elite
+                                            # "FGHWATP" = ATP
+                                            # "FGHWUTP" = UTP
+                                            # "FGHWENT" = Enterprise
+FGT_HW_ADDONS = 29                          # "FGHWFCELU" = FortiCare Elite Upgrade
+                                            # "FGHWFAMS" = FortiGate Cloud Management
+                                            # "FGHWFAIS" = AI-Based In-line Sandbox
+                                            # "FGHWSWNM" = SD-WAN Underlay
+                                            # "FGHWDLDB" = FortiGuard DLP
+                                            # "FGHWFAZC" = FortiAnalyzer Cloud
+                                            # "FGHWSOCA" = SOCaaS
+                                            # "FGHWMGAS" = Managed FortiGate
+                                            # "FGHWSPAL" = SD-WAN Connector for FortiSASE
+                                            # "FGHWFCSS" = FortiConverter Service
+
+###########################################
+# FortiWeb Cloud - Private                #
+###########################################
+FWBC_PRIVATE_AVERAGE_THROUGHPUT = 32        # All Mbps - 10, 25, 50, 75, 100, 150, 200, 250, 300, 350, 400, 500, 600, 700, 800, 900, 1000, 1500, 2000, 2500, 3000, 3500, 4000, 4500, 5000, 5500, 6000, 6500, 7000, 7500, 8000, 8500, 9000, 9500, 10000
+FWBC_PRIVATE_WEB_APPLICATIONS = 33          # 0 - 2000 inclusive
+
+###########################################
+# FortiWeb Cloud - Public                 #
+###########################################
+FWBC_PUBLIC_AVERAGE_THROUGHPUT = 34        # All Mbps - 10, 25, 50, 75, 100, 150, 200, 250, 300, 350, 400, 500, 600, 700, 800, 900, 1000, 1500, 2000, 2500, 3000, 3500, 4000, 4500, 5000, 5500, 6000, 6500, 7000, 7500, 8000, 8500, 9000, 9500, 10000
+FWBC_PUBLIC_WEB_APPLICATIONS = 35          # 0 - 2000 inclusive
+
+FC_EMS_CLOUD_ZTNA_NUM = 37                 # Value should be divisible by 25. 0 - 25000 inclusive
+FC_EMS_CLOUD_ZTNA_FGF_NUM = 38             # Value should be divisible by 25. 0 - 25000 inclusive
+FC_EMS_CLOUD_EPP_ZTNA_NUM = 39             # Value should be divisible by 25. 0 - 25000 inclusive
+FC_EMS_CLOUD_EPP_ZTNA_FGF_NUM = 40         # Value should be divisible by 25. 0 - 25000 inclusive
+FC_EMS_CLOUD_CHROMEBOOK = 41               # Value should be divisible by 25. 0 - 25000 inclusive
+FC_EMS_CLOUD_ADDONS = 42                   # "BPS" = FortiCare Best Practice
+
+
+PRODUCT_TYPE_NAMES: Dict[int, str] = {
+    FGT_VM_BUNDLE: "FGT_VM_BUNDLE",
+    FMG_VM: "FMG_VM",
+    FWB_VM: "FWB_VM",
+    FGT_VM_LCS: "FGT_VM_LCS",
+    FC_EMS_OP: "FC_EMS_OP",
+    FAZ_VM: "FAZ_VM",
+    FPC_VM: "FPC_VM",
+    FAD_VM: "FAD_VM",
+    FGT_HW: "FGT_HW",
+    FWBC_PRIVATE: "FWBC_PRIVATE",
+    FWBC_PUBLIC: "FWBC_PUBLIC",
+    FC_EMS_CLOUD: "FC_EMS_CLOUD",
+}
+
+
+@dataclass(frozen=True)
+class ParameterSpec:
+    """Valid values of one configuration parameter, keyed by its parameter ID."""
+    id: int
+    name: str
+    product_type: int
+    description: str
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+    multiple_of: Optional[int] = None
+    allowed_numbers: Tuple[int, ...] = ()
+    choices: Dict[str, str] = field(default_factory=dict)
+    retired: FrozenSet[str] = frozenset()      # codes that are no longer available
+    add_on: bool = False                       # may be repeated, or set to "NONE"
+
+    def validate(self, value: Any) -> Optional[str]:
+        """Return an error message, or None when the value is valid."""
+        if self.choices:
+            code = str(value).strip()
+            if self.add_on and code == "NONE":
+                return None
+            if code in self.retired:
+                return f"{self.name} ({self.id}): '{code}' is no longer available"
+            if code not in self.choices:
+                return f"{self.name} ({self.id}): '{code}' is not one of {', '.join(sorted(self.choices))}"
+            return None
+        try:
+            number = int(str(value).strip())
+        except ValueError:
+            return f"{self.name} ({self.id}): '{value}' is not an integer"
+        if self.allowed_numbers and number not in self.allowed_numbers:
+            return f"{self.name} ({self.id}): {number} is not one of {', '.join(map(str, self.allowed_numbers))}"
+        if self.min_value is not None and number < self.min_value:
+            return f"{self.name} ({self.id}): {number} is below the minimum of {self.min_value}"
+        if self.max_value is not None and number > self.max_value:
+            return f"{self.name} ({self.id}): {number} is above the maximum of {self.max_value}"
+        if self.multiple_of and number % self.multiple_of:
+            return f"{self.name} ({self.id}): {number} is not divisible by {self.multiple_of}"
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        spec: Dict[str, Any] = {"id": self.id, "name": self.name, "description": self.description}
+        if self.choices:
+            spec["choices"] = {code: label for code, label in self.choices.items() if code not in self.retired}
+        if self.allowed_numbers:
+            spec["allowed_values"] = list(self.allowed_numbers)
+        if self.min_value is not None:
+            spec["min"] = self.min_value
+        if self.max_value is not None:
+            spec["max"] = self.max_value
+        if self.multiple_of:
+            spec["multiple_of"] = self.multiple_of
+        if self.add_on:
+            spec["add_on"] = True
+        return spec
+
+
+_FWBC_THROUGHPUTS = (10, 25, 50, 75, 100, 150, 200, 250, 300, 350, 400, 500, 600, 700, 800, 900, 1000,
+                     1500, 2000, 2500, 3000, 3500, 4000, 4500, 5000, 5500, 6000, 6500, 7000, 7500,
+                     8000, 8500, 9000, 9500, 10000)
+
+_FGT_HW_MODELS = {
+    "FGT40F": "FortiGate 40F", "FWF40F": "FortiWifi 40F", "FGT60E": "FortiGate 60E",
+    "FGT60F": "FortiGate 60F", "FWF60F": "FortiWifi 60F", "FGR60F": "FortiGateRugged 60F",
+    "FGT61F": "FortiGate 61F", "FGT70F": "FortiGate 70F", "FR70FB": "FortiGateRugged 70F",
+    "FGT80F": "FortiGate 80F", "FGT81F": "FortiGate 81F", "FG100E": "FortiGate 100E",
+    "FG100F": "FortiGate 100F", "FG101E": "FortiGate 101E", "FG101F": "FortiGate 101F",
+    "FG200E": "FortiGate 200E", "FG200F": "FortiGate 200F", "FG201F": "FortiGate 201F",
+    "FG4H0F": "FortiGate 400F", "FG4H1F": "FortiGate 401F", "FG6H0F": "FortiGate 600F",
+    "FG1K0F": "FortiGate 1000F", "FG180F": "FortiGate 1800F", "F2K60F": "FortiGate 2600F",
+    "FG3K0F": "FortiGate 3000F", "FG3K1F": "FortiGate 3001F", "FG3K2F": "FortiGate 3200F",
+    "FG40FI": "FortiGate 40F-3G4G", "FW40FI": "FortiWifi 40F-3G4G", "FWF61F": "FortiWifi 61F",
+    "FR60FI": "FortiGateRugged 60F 3G4G", "FGT71F": "FortiGate 71F", "FG80FP": "FortiGate 80F-PoE",
+    "FG80FB": "FortiGate 80F-Bypass", "FG80FD": "FortiGate 80F DSL", "FWF80F": "FortiWiFi 80F-2R",
+    "FW80FS": "FortiWiFi 80F-2R-3G4G-DSL", "FWF81F": "FortiWiFi 81F 2R", "FW81FS": "FortiWiFi 81F-2R-3G4G-DSL",
+    "FW81FD": "FortiWiFi 81F-2R-3G4G-PoE", "FW81FP": "FortiWiFi 81F 2R POE", "FG81FP": "FortiGate 81F-PoE",
+    "FGT90G": "FortiGate 90G", "FGT91G": "FortiGate 91G", "FG201E": "FortiGate 201E",
+    "FG4H0E": "FortiGate 400E", "FG4HBE": "FortiGate 400E BYPASS", "FG4H1E": "FortiGate 401E",
+    "FD4H1E": "FortiGate 401E DC", "FG6H0E": "FortiGate 600E", "FG6H1E": "FortiGate 601E",
+    "FG6H1F": "FortiGate 601F", "FG9H0G": "FortiGate 900G", "FG9H1G": "FortiGate 901G",
+    "FG1K1F": "FortiGate 1001F", "FG181F": "FortiGate 1801F", "FG3K7F": "FortiGate 3700F",
+    "FG39E6": "FortiGate 3960E", "FG441F": "FortiGate 4401F",
+}
+
+CONFIG_PARAMETERS: Dict[int, ParameterSpec] = {spec.id: spec for spec in (
+    # FortiGate VM - Service Bundle
+    ParameterSpec(FGT_VM_BUNDLE_CPU_SIZE, "FGT_VM_BUNDLE_CPU_SIZE", FGT_VM_BUNDLE, "Number of CPUs",
+                  min_value=1, max_value=96),
+    ParameterSpec(FGT_VM_BUNDLE_SVC_PKG, "FGT_VM_BUNDLE_SVC_PKG", FGT_VM_BUNDLE, "Service package",
+                  choices={"FC": "FortiCare", "UTP": "UTP", "ENT": "Enterprise", "ATP": "ATP", "UTM": "UTM"},
+                  retired=frozenset({"UTM"})),
+    ParameterSpec(FGT_VM_BUNDLE_VDOM_NUM, "FGT_VM_BUNDLE_VDOM_NUM", FGT_VM_BUNDLE, "Number of VDOMs",
+                  min_value=0, max_value=500),
+    ParameterSpec(FGT_VM_BUNDLE_FORITI_GUARD_SERVICES, "FGT_VM_BUNDLE_FORITI_GUARD_SERVICES", FGT_VM_BUNDLE,
+                  "FortiGuard services", add_on=True,
+                  choices={"FGTAVDB": "Advanced Malware Protection", "FGTFAIS": "AI-Based In-line Sandbox",
+                           "FGTISSS": "FortiGuard OT Security Service", "FGTDLDB": "FortiGuard DLP",
+                           "FGTFGSA": "FortiGuard Attack Surface Security Service",
+                           "FGTFCSS": "FortiConverter Service"}),
+    ParameterSpec(FGT_VM_BUNDLE_CLOUD_SERVICES, "FGT_VM_BUNDLE_CLOUD_SERVICES", FGT_VM_BUNDLE,
+                  "Cloud services", add_on=True,
+                  choices={"FGTFAMS": "FortiGate Cloud Management", "FGTSWNM": "SD-WAN Underlay",
+                           "FGTSOCA": "SOCaaS", "FGTFAZC": "FortiAnalyzer Cloud",
+                           "FGTSWOS": "Cloud-based Overlay-as-a-Service",
+                           "FGTFSPA": "SD-WAN Connector for FortiSASE"}),
+    ParameterSpec(FGT_VM_BUNDLE_SUPPORT_SERVICE, "FGT_VM_BUNDLE_SUPPORT_SERVICE", FGT_VM_BUNDLE,
+                  "Support service", add_on=True, choices={"FGTFCELU": "FC Elite Upgrade"}),
+    # FortiManager VM
+    ParameterSpec(FMG_VM_MANAGED_DEV, "FMG_VM_MANAGED_DEV", FMG_VM, "Number of managed devices",
+                  min_value=1, max_value=100000),
+    ParameterSpec(FMG_VM_ADOM_NUM, "FMG_VM_ADOM_NUM", FMG_VM, "Number of ADOMs",
+                  min_value=1, max_value=100000),
+    # FortiWeb VMe - Service Bundle
+    ParameterSpec(FWB_VM_CPU_SIZE, "FWB_VM_CPU_SIZE", FWB_VM, "Number of CPUs", allowed_numbers=(1, 2, 4, 8, 16)),
+    ParameterSpec(FWB_VM_SVC_PKG, "FWB_VM_SVC_PKG", FWB_VM, "Service package",
+                  choices={"FWBSTD": "Standard", "FWBADV": "Advanced"}),
+    # FortiGate VM - A La Carte
+    ParameterSpec(FGT_VM_LCS_CPU_SIZE, "FGT_VM_LCS_CPU_SIZE", FGT_VM_LCS, "Number of CPUs",
+                  min_value=1, max_value=96),
+    ParameterSpec(FGT_VM_LCS_FORTIGUARD_SERVICES, "FGT_VM_LCS_FORTIGUARD_SERVICES", FGT_VM_LCS,
+                  "FortiGuard services", add_on=True,
+                  choices={"IPS": "Intrusion Prevention", "AVDB": "Advanced Malware",
+                           "FURLDNS": "Web, DNS & Video Filtering", "FGSA": "Security Rating", "DLDB": "DLP",
+                           "FAIS": "AI-Based InLine Sandbox", "FURL": "Web & Video Filtering",
+                           "IOTH": "IOT Detection", "ISSS": "Industrial Security"},
+                  retired=frozenset({"FURL", "IOTH", "ISSS"})),
+    ParameterSpec(FGT_VM_LCS_SUPPORT_SERVICE, "FGT_VM_LCS_SUPPORT_SERVICE", FGT_VM_LCS, "Support service",
+                  choices={"FC247": "FortiCare Premium", "ASET": "FortiCare Elite"}),
+    ParameterSpec(FGT_VM_LCS_VDOM_NUM, "FGT_VM_LCS_VDOM_NUM", FGT_VM_LCS, "Number of VDOMs",
+                  min_value=1, max_value=500),
+    ParameterSpec(FGT_VM_LCS_CLOUD_SERVICES, "FGT_VM_LCS_CLOUD_SERVICES", FGT_VM_LCS, "Cloud services",
+                  add_on=True,
+                  choices={"FAMS": "FortiGate Cloud", "SWNM": "SD-WAN Cloud",
+                           "AFAC": "FortiAnalyzer Cloud with SOCaaS", "FAZC": "FortiAnalyzer Cloud",
+                           "FMGC": "FortiManager Cloud"},
+                  retired=frozenset({"FMGC"})),
+    # FortiClient EMS On-Prem
+    ParameterSpec(FC_EMS_OP_ZTNA_NUM, "FC_EMS_OP_ZTNA_NUM", FC_EMS_OP, "ZTNA/VPN endpoints",
+                  min_value=0, max_value=25000),
+    ParameterSpec(FC_EMS_OP_EPP_ZTNA_NUM, "FC_EMS_OP_EPP_ZTNA_NUM", FC_EMS_OP, "EPP/ATP + ZTNA/VPN endpoints",
+                  min_value=0, max_value=25000),
+    ParameterSpec(FC_EMS_OP_CHROMEBOOK, "FC_EMS_OP_CHROMEBOOK", FC_EMS_OP, "Chromebooks",
+                  min_value=0, max_value=25000),
+    ParameterSpec(FC_EMS_OP_SUPPORT_SERVICE, "FC_EMS_OP_SUPPORT_SERVICE", FC_EMS_OP, "Support service",
+                  choices={"FCTFC247": "FortiCare Premium"}),
+    ParameterSpec(FC_EMS_OP_ADDOS, "FC_EMS_OP_ADDOS", FC_EMS_OP, "Add-ons", add_on=True,
+                  choices={"BPS": "FortiCare Best Practice"}),
+    # FortiAnalyzer VM
+    ParameterSpec(FAZ_VM_DAILY_STORAGE, "FAZ_VM_DAILY_STORAGE", FAZ_VM, "Daily storage (GB)",
+                  min_value=5, max_value=8300),
+    ParameterSpec(FAZ_VM_ADOM_NUM, "FAZ_VM_ADOM_NUM", FAZ_VM, "Number of ADOMs", min_value=0, max_value=1200),
+    ParameterSpec(FAZ_VM_SUPPORT_SERVICE, "FAZ_VM_SUPPORT_SERVICE", FAZ_VM, "Support service",
+                  choices={"FAZFC247": "FortiCare Premium"}),
+    # FortiPortal VM
+    ParameterSpec(FPC_VM_MANAGED_DEV, "FPC_VM_MANAGED_DEV", FPC_VM, "Number of managed devices",
+                  min_value=0, max_value=100000),
+    # FortiADC VM
+    ParameterSpec(FAD_VM_CPU_SIZE, "FAD_VM_CPU_SIZE", FAD_VM, "Number of CPUs",
+                  allowed_numbers=(1, 2, 4, 8, 16, 32)),
+    ParameterSpec(FAD_VM_SERVICE_PACKAGE, "FAD_VM_SERVICE_PACKAGE", FAD_VM, "Service package",
+                  choices={"FDVSTD": "Standard", "FDVADV": "Advanced", "FDVFC247": "FortiCare Premium"}),
+    # FortiGate Hardware
+    ParameterSpec(FGT_HW_DEVICE_MODEL, "FGT_HW_DEVICE_MODEL", FGT_HW, "Device model", choices=_FGT_HW_MODELS),
+    ParameterSpec(FGT_HW_SERVICE_PACKAGE, "FGT_HW_SERVICE_PACKAGE", FGT_HW, "Service package",
+                  choices={"FGHWFC247": "FortiCare Premium", "FGHWFCEL": "FortiCare Elite", "FGHWATP": "ATP",
+                           "FGHWUTP": "UTP", "FGHWENT": "Enterprise"}),
+    ParameterSpec(FGT_HW_ADDONS, "FGT_HW_ADDONS", FGT_HW, "Add-ons", add_on=True,
+                  choices={"FGHWFCELU": "FortiCare Elite Upgrade", "FGHWFAMS": "FortiGate Cloud Management",
+                           "FGHWFAIS": "AI-Based In-line Sandbox", "FGHWSWNM": "SD-WAN Underlay",
+                           "FGHWDLDB": "FortiGuard DLP", "FGHWFAZC": "FortiAnalyzer Cloud",
+                           "FGHWSOCA": "SOCaaS", "FGHWMGAS": "Managed FortiGate",
+                           "FGHWSPAL": "SD-WAN Connector for FortiSASE", "FGHWFCSS": "FortiConverter Service"}),
+    # FortiWeb Cloud - Private
+    ParameterSpec(FWBC_PRIVATE_AVERAGE_THROUGHPUT, "FWBC_PRIVATE_AVERAGE_THROUGHPUT", FWBC_PRIVATE,
+                  "Average throughput (Mbps)", allowed_numbers=_FWBC_THROUGHPUTS),
+    ParameterSpec(FWBC_PRIVATE_WEB_APPLICATIONS, "FWBC_PRIVATE_WEB_APPLICATIONS", FWBC_PRIVATE,
+                  "Number of web applications", min_value=0, max_value=2000),
+    # FortiWeb Cloud - Public
+    ParameterSpec(FWBC_PUBLIC_AVERAGE_THROUGHPUT, "FWBC_PUBLIC_AVERAGE_THROUGHPUT", FWBC_PUBLIC,
+                  "Average throughput (Mbps)", allowed_numbers=_FWBC_THROUGHPUTS),
+    ParameterSpec(FWBC_PUBLIC_WEB_APPLICATIONS, "FWBC_PUBLIC_WEB_APPLICATIONS", FWBC_PUBLIC,
+                  "Number of web applications", min_value=0, max_value=2000),
+    # FortiClient EMS Cloud
+    ParameterSpec(FC_EMS_CLOUD_ZTNA_NUM, "FC_EMS_CLOUD_ZTNA_NUM", FC_EMS_CLOUD, "ZTNA/VPN endpoints",
+                  min_value=0, max_value=25000, multiple_of=25),
+    ParameterSpec(FC_EMS_CLOUD_ZTNA_FGF_NUM, "FC_EMS_CLOUD_ZTNA_FGF_NUM", FC_EMS_CLOUD,
+                  "ZTNA/VPN + FortiGuard Forensics endpoints", min_value=0, max_value=25000, multiple_of=25),
+    ParameterSpec(FC_EMS_CLOUD_EPP_ZTNA_NUM, "FC_EMS_CLOUD_EPP_ZTNA_NUM", FC_EMS_CLOUD,
+                  "EPP/ATP + ZTNA/VPN endpoints", min_value=0, max_value=25000, multiple_of=25),
+    ParameterSpec(FC_EMS_CLOUD_EPP_ZTNA_FGF_NUM, "FC_EMS_CLOUD_EPP_ZTNA_FGF_NUM", FC_EMS_CLOUD,
+                  "EPP/ATP + ZTNA/VPN + FortiGuard Forensics endpoints", min_value=0, max_value=25000,
+                  multiple_of=25),
+    ParameterSpec(FC_EMS_CLOUD_CHROMEBOOK, "FC_EMS_CLOUD_CHROMEBOOK", FC_EMS_CLOUD, "Chromebooks",
+                  min_value=0, max_value=25000, multiple_of=25),
+    ParameterSpec(FC_EMS_CLOUD_ADDONS, "FC_EMS_CLOUD_ADDONS", FC_EMS_CLOUD, "Add-ons", add_on=True,
+                  choices={"BPS": "FortiCare Best Practice"}),
+)}
+
+PRODUCT_TYPE_PARAMETERS: Dict[int, Tuple[ParameterSpec, ...]] = {
+    product_type: tuple(spec for spec in CONFIG_PARAMETERS.values() if spec.product_type == product_type)
+    for product_type in PRODUCT_TYPE_NAMES
+}
+
+
+def product_type_id(product_type: Any) -> Optional[int]:
+    """Resolve a product type given as an ID or a name such as 'FGT_VM_BUNDLE'."""
+    if product_type in (None, ""):
+        return None
+    if str(product_type).isdigit():
+        return int(product_type)
+    for type_id, name in PRODUCT_TYPE_NAMES.items():
+        if name == str(product_type).upper():
+            return type_id
+    raise ValueError(f"Unknown product type: {product_type}")
+
+
+def validate_config_parameters(parameters: List[Dict[str, Any]]) -> List[str]:
+    """
+    Check a configs/update parameter list against CONFIG_PARAMETERS.
+
+    Returns:
+        List of error messages; empty when every parameter is valid.
+    """
+    errors = []
+    product_types = set()
+    single_valued = set()
+    for parameter in parameters:
+        try:
+            parameter_id = int(parameter["id"])
+            value = parameter["value"]
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"Parameter {parameter!r} must be an object with an integer 'id' and a 'value'")
+            continue
+        spec = CONFIG_PARAMETERS.get(parameter_id)
+        if spec is None:
+            errors.append(f"Unknown parameter id {parameter_id}")
+            continue
+        product_types.add(spec.product_type)
+        if not spec.add_on:
+            if parameter_id in single_valued:
+                errors.append(f"{spec.name} ({spec.id}) is given more than once")
+            single_valued.add(parameter_id)
+        error = spec.validate(value)
+        if error:
+            errors.append(error)
+    if len(product_types) > 1:
+        names = ", ".join(sorted(PRODUCT_TYPE_NAMES[product_type] for product_type in product_types))
+        errors.append(f"Parameters belong to more than one product type: {names}")
+    return errors
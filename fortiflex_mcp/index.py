@@ -0,0 +1,213 @@
+"""
+Local index of the account's entitlements, optionally mirrored to SQLite.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from . import transport
+from .records import Entitlement
+from .settings import FORTIFLEX_API_BASE_URI, INDEX_TTL, INDEX_DB_PATH, account_id, program_sn
+
+
+class EntitlementIndex:
+    """
+    Local index of the account's entitlements built from entitlements/list.
+
+    Records are compact Entitlement objects keyed by serialNumber, with
+    secondary indexes on status, configId and description. The list is
+    parsed while it downloads, one record at a time, so a sync never holds
+    the whole response as dicts. Each sync only touches the records that
+    changed since the previous one. When db_path is set the index is
+    mirrored to a SQLite file and reloaded from it when the index is first
+    used.
+    """
+
+    def __init__(self, ttl: float = INDEX_TTL, db_path: str = INDEX_DB_PATH):
+        self.ttl = ttl
+        self.db_path = db_path
+        self._by_serial: Dict[str, Entitlement] = {}
+        self._by_status: Dict[str, set] = {}
+        self._by_config: Dict[str, set] = {}
+        self._by_description: Dict[str, set] = {}
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+        self._db = None
+        self._loaded = not db_path
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._by_serial)
+
+    @property
+    def synced_at(self) -> float:
+        self._ensure_loaded()
+        return self._synced_at
+
+    def is_stale(self) -> bool:
+        self._ensure_loaded()
+        return time.time() - self._synced_at >= self.ttl
+
+    def mark_stale(self) -> None:
+        self._ensure_loaded()
+        self._synced_at = 0.0
+
+    async def ensure_fresh(self, access_token: str = "") -> None:
+        if self.is_stale():
+            await self.refresh(access_token)
+
+    async def refresh(self, access_token: str = "", force: bool = False) -> Dict[str, Any]:
+        """
+        Re-sync the index from entitlements/list unless another caller just did.
+
+        The whole list is read before the index is touched, so a sync whose
+        response has no complete entitlements list raises and leaves the
+        index, its sync time and the SQLite mirror as they were.
+        """
+        async with self._lock:
+            self._ensure_loaded()
+            if not force and not self.is_stale():
+                return self.summary()
+            logging.debug("--> Syncing the FortiFlex entitlements index...")
+            body = {
+                "accountId": account_id,
+                "programSerialNumber": program_sn,
+            }
+            uri = FORTIFLEX_API_BASE_URI + "entitlements/list"
+            items = transport.stream_json_items(uri, body, "entitlements", access_token)
+            try:
+                records = [Entitlement.from_dict(item) async for item in items if item.get("serialNumber")]
+            except Exception as e:
+                logging.error(f"Entitlements index sync failed, keeping {len(self._by_serial)} entitlements: {e}")
+                raise
+            finally:
+                await items.aclose()
+            changed, removed = self._apply(records)
+            self._synced_at = time.time()
+            if self.db_path:
+                await asyncio.to_thread(self._save_db, changed, removed)
+            summary = self.summary()
+            summary.update({"changed": len(changed), "removed": len(removed)})
+            return summary
+
+    def summary(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return {
+            "entitlements": len(self._by_serial),
+            "synced_at": self._synced_at,
+            "statuses": {status: len(serials) for status, serials in self._by_status.items()},
+        }
+
+    def get(self, serial_number: str) -> Optional[Entitlement]:
+        self._ensure_loaded()
+        return self._by_serial.get(serial_number)
+
+    def query(self, status: str = "", config_id: Any = "", description: str = "",
+              description_contains: str = "") -> List[Entitlement]:
+        """Return the entitlements matching every given filter."""
+        self._ensure_loaded()
+        candidates: Optional[set] = None
+        for bucket, key in ((self._by_status, status.upper() if status else ""),
+                            (self._by_config, str(config_id) if config_id not in (None, "") else ""),
+                            (self._by_description, description.lower() if description else "")):
+            if not key:
+                continue
+            serials = bucket.get(key, set())
+            candidates = serials if candidates is None else candidates & serials
+        records = (self._by_serial[sn] for sn in candidates) if candidates is not None else self._by_serial.values()
+        if description_contains:
+            needle = description_contains.lower()
+            records = (r for r in records if needle in (r.description or "").lower())
+        return list(records)
+
+    def _keys(self, record: Entitlement):
+        yield self._by_status, (record.status or "").upper()
+        yield self._by_config, str(record.configId)
+        yield self._by_description, (record.description or "").lower()
+
+    def _add(self, record: Entitlement) -> None:
+        serial = record.serialNumber
+        self._by_serial[serial] = record
+        for bucket, key in self._keys(record):
+            bucket.setdefault(key, set()).add(serial)
+
+    def _remove(self, serial: str) -> None:
+        record = self._by_serial.pop(serial, None)
+        if record is None:
+            return
+        for bucket, key in self._keys(record):
+            serials = bucket.get(key)
+            if serials is not None:
+                serials.discard(serial)
+                if not serials:
+                    del bucket[key]
+
+    def _apply(self, records: List[Entitlement]):
+        changed = []
+        seen = set()
+        for record in records:
+            serial = record.serialNumber
+            seen.add(serial)
+            if self._by_serial.get(serial) == record:
+                continue
+            self._remove(serial)
+            self._add(record)
+            changed.append(record)
+        removed = [serial for serial in self._by_serial if serial not in seen]
+        for serial in removed:
+            self._remove(serial)
+        return changed, removed
+
+    def _ensure_loaded(self) -> None:
+        # Reading the mirror can take a while for a large account, so it is
+        # deferred from import time to the first lookup.
+        if not self._loaded:
+            self._loaded = True
+            self._load_db()
+
+    def _connect(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS entitlements (
+                    serial_number TEXT PRIMARY KEY,
+                    status TEXT,
+                    config_id TEXT,
+                    description TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entitlements_status ON entitlements (status);
+                CREATE INDEX IF NOT EXISTS entitlements_config_id ON entitlements (config_id);
+                CREATE INDEX IF NOT EXISTS entitlements_description ON entitlements (description);
+                CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+        return self._db
+
+    def _load_db(self) -> None:
+        db = self._connect()
+        for (data,) in db.execute("SELECT data FROM entitlements"):
+            self._add(Entitlement.from_dict(json.loads(data)))
+        row = db.execute("SELECT value FROM index_meta WHERE key = 'synced_at'").fetchone()
+        self._synced_at = float(row[0]) if row else 0.0
+
+    def _save_db(self, changed: List[Entitlement], removed: List[str]) -> None:
+        db = self._connect()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO entitlements VALUES (?, ?, ?, ?, ?)",
+                [(r.serialNumber, (r.status or "").upper(), str(r.configId),
+                  (r.description or "").lower(), json.dumps(r.to_dict())) for r in changed],
+            )
+            db.executemany("DELETE FROM entitlements WHERE serial_number = ?", [(sn,) for sn in removed])
+            db.execute("INSERT OR REPLACE INTO index_meta VALUES ('synced_at', ?)", (str(self._synced_at),))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+entitlement_index = EntitlementIndex()
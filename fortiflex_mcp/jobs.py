@@ -0,0 +1,454 @@
+"""
+Durable job queue for long-running lifecycle operations.
+
+A job is a list of FortiFlex write requests (stop, reactivate, vm token or
+configs/update), stored in SQLite before anything is sent. A pool of
+workers drains the queue at most JOBS_WORKERS requests at a time, marking
+each item running before its request and recording the response after it,
+so a restarted server resumes every job where it stopped. An item that was
+in flight when the process died is sent again.
+
+A job submitted with the caller's access_token is marked as such and only
+the process that submitted it, which alone holds the token in memory,
+sends its items. Once that process is gone (another worker process, or
+the same server after a restart, finds it dead) the unsent items fail
+instead of being sent under the server's own credentials.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+from . import transport
+from .cache import response_cache, entitlements_changed
+from .settings import (COMMON_HEADERS, FORTIFLEX_API_BASE_URI, JOBS_DB_PATH, JOBS_WORKERS, JOBS_RETENTION,
+                       JOBS_POLL_INTERVAL)
+
+# Operation name -> API endpoint; each item's payload is the request body.
+OPERATIONS = {
+    "stop": "entitlements/stop",
+    "reactivate": "entitlements/reactivate",
+    "vm_token": "entitlements/vm/token",
+    "update_config": "configs/update",
+}
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of jobs and their items, drained by a pool of asyncio workers.
+
+    Items are claimed in submission order inside an immediate transaction,
+    so several server processes can share one queue file. Submitting with an
+    idempotency key that is already known returns the existing job instead of
+    queueing the operation twice.
+    """
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, workers: int = JOBS_WORKERS, retention: float = JOBS_RETENTION):
+        self.db_path = db_path
+        self.workers = max(workers, 1)
+        self.retention = retention
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        # Caller tokens of the jobs this process submitted, kept in memory only until the job finishes.
+        self._tokens: Dict[str, str] = {}
+        self._owner = str(os.getpid())
+        self._submitter = f"{self._owner}:{uuid.uuid4().hex[:12]}"      # pid:instance of this queue
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "in_flight": 0, "resumed": 0}
+
+    # -- storage ----------------------------------------------------------------
+
+    def _connect(self):
+        if self._db is None:
+            import sqlite3
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            db.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    idempotency_key TEXT UNIQUE,
+                    status TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    submitter TEXT,
+                    caller_token INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    owner TEXT,
+                    response TEXT,
+                    error TEXT,
+                    finished_at REAL,
+                    UNIQUE (job_id, seq)
+                );
+                CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status);
+            """)
+            # Queue files created before jobs recorded their submitter.
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            if "submitter" not in columns:
+                db.execute("ALTER TABLE jobs ADD COLUMN submitter TEXT")
+            if "caller_token" not in columns:
+                db.execute("ALTER TABLE jobs ADD COLUMN caller_token INTEGER NOT NULL DEFAULT 0")
+            self._db = db
+            self._recover()
+        return self._db
+
+    def _recover(self) -> None:
+        """Requeue the items of processes that died mid-request and drop expired finished jobs."""
+        db = self._db
+        owners = [owner for (owner,) in
+                  db.execute("SELECT DISTINCT owner FROM job_items WHERE status = 'running'")]
+        dead = [owner for owner in owners if not _process_alive(owner)]
+        with _transaction(db):
+            for owner in dead:
+                # Items of caller-token jobs cannot be re-sent; _fail_orphaned() reports them instead.
+                cursor = db.execute("UPDATE job_items SET status = 'pending', owner = NULL "
+                                    "WHERE status = 'running' AND owner = ? AND job_id IN "
+                                    "(SELECT id FROM jobs WHERE caller_token = 0)", (owner,))
+                self.stats["resumed"] += cursor.rowcount
+            expired = [job_id for (job_id,) in db.execute(
+                "SELECT id FROM jobs WHERE status IN ('completed', 'cancelled') AND finished_at < ?",
+                (time.time() - self.retention,))]
+            for job_id in expired:
+                db.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        if self.stats["resumed"]:
+            logging.info("Resuming %d interrupted job items", self.stats["resumed"])
+        self._fail_orphaned()
+
+    def _fail_orphaned(self) -> None:
+        """Fail the pending items of caller-token jobs whose submitting process is gone."""
+        db = self._db
+        submitters = [submitter for (submitter,) in db.execute(
+            "SELECT DISTINCT submitter FROM jobs WHERE caller_token = 1 AND status IN ('queued', 'running') "
+            "AND submitter != ?", (self._submitter,))]
+        gone = [submitter for submitter in submitters if not _submitter_alive(submitter)]
+        if not gone:
+            return
+        now = time.time()
+        errors = {
+            "pending": "Not sent: the job was submitted with a caller access_token, which only the submitting "
+                       "server process held, and that process has stopped. Submit the remaining items again.",
+            "running": "Interrupted: the submitting server process stopped during this request, so it may or may "
+                       "not have been applied; it is not sent again without the caller's access_token.",
+        }
+        with _transaction(db):
+            for submitter in gone:
+                job_ids = [job_id for (job_id,) in db.execute(
+                    "SELECT id FROM jobs WHERE caller_token = 1 AND submitter = ? AND status IN ('queued', 'running')",
+                    (submitter,))]
+                for job_id in job_ids:
+                    for status, error in errors.items():
+                        cursor = db.execute("UPDATE job_items SET status = 'failed', error = ?, finished_at = ? "
+                                            "WHERE job_id = ? AND status = ?", (error, now, job_id, status))
+                        self.stats["failed"] += cursor.rowcount
+                    self._complete_if_done(job_id, now)
+
+    def _call(self, fn, *args):
+        with self._db_lock:
+            self._connect()
+            return fn(*args)
+
+    async def _run_db(self, fn, *args):
+        return await asyncio.to_thread(self._call, fn, *args)
+
+    def _insert(self, job_id: str, operation: str, payloads: List[Dict[str, Any]], idempotency_key: str,
+                caller_token: bool) -> Dict[str, Any]:
+        db = self._db
+        with _transaction(db):
+            if idempotency_key:
+                row = db.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None:
+                    return {**self._status(row[0]), "duplicate": True}
+            now = time.time()
+            status = "queued" if payloads else "completed"
+            db.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (job_id, operation, idempotency_key or None, status, len(payloads), now, now,
+                        None if payloads else now, self._submitter, int(caller_token)))
+            db.executemany("INSERT INTO job_items (job_id, seq, payload, status) VALUES (?, ?, ?, 'pending')",
+                           [(job_id, seq, json.dumps(payload)) for seq, payload in enumerate(payloads)])
+        return {**self._status(job_id), "duplicate": False}
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        db = self._db
+        with _transaction(db):
+            row = db.execute("""
+                SELECT i.rowid, i.job_id, i.seq, i.payload, j.operation, j.caller_token FROM job_items i
+                JOIN jobs j ON j.id = i.job_id
+                WHERE i.status = 'pending' AND j.status IN ('queued', 'running')
+                  AND (j.caller_token = 0 OR j.submitter = ?)
+                ORDER BY i.rowid LIMIT 1
+            """, (self._submitter,)).fetchone()
+            if row is None:
+                return None
+            item_id, job_id, seq, payload, operation, caller_token = row
+            db.execute("UPDATE job_items SET status = 'running', owner = ?, attempts = attempts + 1 "
+                       "WHERE rowid = ?", (self._owner, item_id))
+            db.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                       (time.time(), job_id))
+        return {"item_id": item_id, "job_id": job_id, "seq": seq, "payload": json.loads(payload),
+                "operation": operation, "caller_token": bool(caller_token)}
+
+    def _complete_if_done(self, job_id: str, now: float) -> bool:
+        """Inside a transaction: mark the job finished once no item is pending or running."""
+        db = self._db
+        remaining = db.execute("SELECT COUNT(*) FROM job_items WHERE job_id = ? "
+                               "AND status IN ('pending', 'running')", (job_id,)).fetchone()[0]
+        if remaining:
+            db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+            return False
+        db.execute("UPDATE jobs SET status = CASE status WHEN 'cancelled' THEN status ELSE 'completed' END, "
+                   "updated_at = ?, finished_at = ? WHERE id = ?", (now, now, job_id))
+        return True
+
+    def _finish(self, item: Dict[str, Any], response: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        db = self._db
+        now = time.time()
+        with _transaction(db):
+            db.execute("UPDATE job_items SET status = ?, response = ?, error = ?, finished_at = ? WHERE rowid = ?",
+                       ("failed" if error is not None else "succeeded",
+                        json.dumps(response) if response is not None else None, error, now, item["item_id"]))
+            done = self._complete_if_done(item["job_id"], now)
+        if done:
+            self._tokens.pop(item["job_id"], None)
+
+    def _requeue(self, item: Dict[str, Any]) -> None:
+        with _transaction(self._db):
+            self._db.execute("UPDATE job_items SET status = 'pending', owner = NULL WHERE rowid = ?",
+                             (item["item_id"],))
+
+    def _cancel(self, job_id: str) -> Dict[str, Any]:
+        db = self._db
+        now = time.time()
+        with _transaction(db):
+            if db.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                raise ValueError(f"Unknown job {job_id!r}")
+            cursor = db.execute("UPDATE job_items SET status = 'cancelled', finished_at = ? "
+                                "WHERE job_id = ? AND status = 'pending'", (now, job_id))
+            cancelled = cursor.rowcount
+            db.execute("UPDATE jobs SET status = 'cancelled', updated_at = ?, finished_at = ? "
+                       "WHERE id = ? AND status IN ('queued', 'running')", (now, now, job_id))
+            running = db.execute("SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status = 'running'",
+                                 (job_id,)).fetchone()[0]
+        if not running:
+            self._tokens.pop(job_id, None)
+        return {**self._status(job_id), "cancelled_items": cancelled}
+
+    def _status(self, job_id: str, items: str = "failed", limit: int = 100) -> Dict[str, Any]:
+        db = self._db
+        row = db.execute("SELECT id, operation, idempotency_key, status, total, created_at, updated_at, finished_at "
+                         "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown job {job_id!r}; finished jobs are kept for FORTIFLEX_JOBS_RETENTION seconds")
+        job = dict(zip(("job_id", "operation", "idempotency_key", "status", "total", "created_at", "updated_at",
+                        "finished_at"), row))
+        counts = {status: 0 for status in ("pending", "running", "succeeded", "failed", "cancelled")}
+        counts.update(db.execute("SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status",
+                                 (job_id,)).fetchall())
+        job["counts"] = counts
+        if items:
+            query = "SELECT seq, payload, status, attempts, response, error FROM job_items WHERE job_id = ?"
+            if items != "all":
+                query += " AND status = ?"
+            rows = db.execute(query + " ORDER BY seq LIMIT ?",
+                              (job_id, limit) if items == "all" else (job_id, items, limit)).fetchall()
+            job["items"] = [{"seq": seq, "request": json.loads(payload), "status": status, "attempts": attempts,
+                             "response": json.loads(response) if response else None, "error": error}
+                            for seq, payload, status, attempts, response, error in rows]
+        return job
+
+    def _list(self, status: str, limit: int) -> List[Dict[str, Any]]:
+        query = "SELECT id FROM jobs" + (" WHERE status = ?" if status else "") + " ORDER BY created_at DESC LIMIT ?"
+        ids = [job_id for (job_id,) in self._db.execute(query, (status, limit) if status else (limit,))]
+        return [self._status(job_id, items="") for job_id in ids]
+
+    # -- public API ---------------------------------------------------------------
+
+    async def submit(self, operation: str, payloads: List[Dict[str, Any]], idempotency_key: str = "",
+                     access_token: str = "") -> Dict[str, Any]:
+        """Queue one request per payload and return the job; workers start if they are not running."""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}; use one of {', '.join(OPERATIONS)}")
+        if self._closing:
+            raise RuntimeError("The job queue is shutting down; submit the job again once the server has restarted")
+        job_id = uuid.uuid4().hex[:16]
+        if access_token:
+            # Stored before the job is visible to the workers, which may claim its first item right away.
+            self._tokens[job_id] = access_token
+        try:
+            job = await self._run_db(self._insert, job_id, operation, payloads, idempotency_key, bool(access_token))
+        except BaseException:
+            self._tokens.pop(job_id, None)
+            raise
+        if job["duplicate"]:
+            self._tokens.pop(job_id, None)
+        else:
+            self.stats["submitted"] += 1
+        self.start(force=True)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def status(self, job_id: str, items: str = "failed", limit: int = 100) -> Dict[str, Any]:
+        return await self._run_db(self._status, job_id, items, max(int(limit), 0))
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel the pending items of a job; items already in flight still finish."""
+        return await self._run_db(self._cancel, job_id)
+
+    async def list_jobs(self, status: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+        return await self._run_db(self._list, status, max(int(limit), 1))
+
+    def start(self, force: bool = False) -> None:
+        """
+        Start the workers. Without force they only start when a queue file
+        already exists, so a server that never used jobs does not create one.
+        """
+        if self._tasks or self._closing:
+            return
+        if not force and not os.path.exists(self.db_path):
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        while not self._closing:
+            self._wakeup.clear()
+            try:
+                item = await self._run_db(self._claim)
+            except Exception:
+                logging.exception("Could not claim a job item")
+                item = None
+            if item is None:
+                try:
+                    await self._run_db(self._fail_orphaned)
+                except Exception:
+                    logging.exception("Could not check for orphaned job items")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOBS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._execute(item)
+            except Exception:
+                # e.g. "database is locked" while recording the result; keep the worker alive.
+                logging.exception("Could not run job item %s/%s", item["job_id"], item["seq"])
+
+    async def _execute(self, item: Dict[str, Any]) -> None:
+        uri = FORTIFLEX_API_BASE_URI + OPERATIONS[item["operation"]]
+        response, error = None, None
+        token = self._tokens.get(item["job_id"])
+        if item["caller_token"] and token is None:
+            # Never send a caller's job under the server's credentials.
+            await self._run_db(self._finish, item, None, "Not sent: the caller access_token of this job is no "
+                                                         "longer held by this server process")
+            self.stats["failed"] += 1
+            return
+        self.stats["in_flight"] += 1
+        try:
+            response = await transport.make_request(uri, item["payload"], COMMON_HEADERS.copy(),
+                                                    access_token=token or "")
+        except asyncio.CancelledError:
+            # Shut down mid-request: hand the item back so the next start sends it again.
+            await asyncio.shield(self._run_db(self._requeue, item))
+            raise
+        except Exception as e:
+            error = transport.describe_error(e)
+        finally:
+            self.stats["in_flight"] -= 1
+        if item["operation"] == "update_config":
+            response_cache.invalidate("configs/list")
+        else:
+            entitlements_changed()
+        # The request has been sent; retry recording its result through a transient "database is locked".
+        for attempt in range(3):
+            try:
+                await self._run_db(self._finish, item, response, error)
+                break
+            except Exception:
+                if attempt == 2:
+                    raise
+                logging.warning("Could not record job item %s/%s, retrying", item["job_id"], item["seq"])
+                await asyncio.sleep(JOBS_POLL_INTERVAL)
+        self.stats["failed" if error is not None else "succeeded"] += 1
+
+    async def close(self, grace: float = 5.0) -> None:
+        """Stop claiming items, give in-flight requests grace seconds to finish, then cancel them."""
+        # Submissions arriving meanwhile are refused, whether or not the workers ever started.
+        self._closing = True
+        try:
+            if self._tasks:
+                self._wakeup.set()
+                done, pending = await asyncio.wait(self._tasks, timeout=grace)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                self._tasks = []
+            if self._db is not None:
+                with self._db_lock:
+                    self._db.close()
+                    self._db = None
+        finally:
+            self._closing = False
+
+    def summary(self) -> Dict[str, Any]:
+        return {"db_path": self.db_path, "workers": self.workers, "running": bool(self._tasks), **self.stats}
+
+
+@contextmanager
+def _transaction(db):
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent processes serialize their claims."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+def _submitter_alive(submitter: Optional[str]) -> bool:
+    """Whether the queue that submitted a job ("pid:instance") still runs; a reused PID is a different instance."""
+    pid, _, instance = (submitter or "").partition(":")
+    if pid == str(os.getpid()):
+        return False        # this process's own queue is excluded by the caller, so this is an earlier one
+    return _process_alive(pid)
+
+
+def _process_alive(owner: Optional[str]) -> bool:
+    try:
+        pid = int(owner)
+    except (TypeError, ValueError):
+        return False
+    if pid == os.getpid():
+        # Items claimed under this PID before the queue was opened belong to an earlier process.
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+job_queue = JobQueue()
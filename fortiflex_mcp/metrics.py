@@ -0,0 +1,221 @@
+"""
+Per-tool and per-upstream-endpoint latency histograms and counters.
+"""
+import contextvars
+import functools
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds), Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if count and seen + count >= rank:
+                return round(min(lower + (upper - lower) * (rank - seen) / count, self.max), 6)
+            seen += count
+            lower = upper
+        return round(self.max, 6)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 6) if self.count else None,
+        }
+
+    def prometheus_lines(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics:
+    """
+    Per-tool and per-upstream-endpoint counters and latency histograms.
+
+    Tool latency is split into the time spent waiting for an OAuth token;
+    upstream latency into connection setup (TCP + TLS, only when a new
+    connection is opened) and server time (request sent to response headers).
+    """
+
+    def __init__(self):
+        self.tool_latency: Dict[str, Histogram] = {}
+        self.tool_auth: Dict[str, Histogram] = {}
+        self.tool_calls: Dict[Tuple[str, str], int] = {}
+        self.tool_in_flight: Dict[str, int] = {}
+        self.upstream_latency: Dict[str, Histogram] = {}
+        self.upstream_connect: Dict[str, Histogram] = {}
+        self.upstream_server: Dict[str, Histogram] = {}
+        self.upstream_responses: Dict[Tuple[str, str], int] = {}
+        self.upstream_bytes: Dict[str, int] = {}
+        self.upstream_retries: Dict[str, int] = {}
+        self.upstream_in_flight: Dict[str, int] = {}
+
+    @staticmethod
+    def _histogram(histograms: Dict[str, Histogram], key: str) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram()
+        return histogram
+
+    @staticmethod
+    def _increment(counters: Dict[Any, int], key: Any, amount: int = 1) -> None:
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe_tool(self, tool: str, seconds: float, outcome: str) -> None:
+        self._histogram(self.tool_latency, tool).observe(seconds)
+        self._increment(self.tool_calls, (tool, outcome))
+
+    def observe_auth(self, tool: str, seconds: float) -> None:
+        self._histogram(self.tool_auth, tool).observe(seconds)
+
+    def observe_upstream(self, endpoint: str, status: str, seconds: float,
+                         connect: Optional[float], server: Optional[float]) -> None:
+        self._histogram(self.upstream_latency, endpoint).observe(seconds)
+        if connect is not None:
+            self._histogram(self.upstream_connect, endpoint).observe(connect)
+        if server is not None:
+            self._histogram(self.upstream_server, endpoint).observe(server)
+        self._increment(self.upstream_responses, (endpoint, status))
+
+    def add_bytes(self, endpoint: str, size: int) -> None:
+        self._increment(self.upstream_bytes, endpoint, size)
+
+    def add_retry(self, endpoint: str) -> None:
+        self._increment(self.upstream_retries, endpoint)
+
+    def snapshot(self) -> Dict[str, Any]:
+        tools = {}
+        for tool, histogram in self.tool_latency.items():
+            tools[tool] = {
+                "calls": sum(n for (name, _), n in self.tool_calls.items() if name == tool),
+                "errors": self.tool_calls.get((tool, "error"), 0),
+                "in_flight": self.tool_in_flight.get(tool, 0),
+                "latency": histogram.summary(),
+            }
+            if tool in self.tool_auth:
+                tools[tool]["auth"] = self.tool_auth[tool].summary()
+        upstream = {}
+        for endpoint, histogram in self.upstream_latency.items():
+            upstream[endpoint] = {
+                "responses": {status: n for (name, status), n in self.upstream_responses.items() if name == endpoint},
+                "retries": self.upstream_retries.get(endpoint, 0),
+                "bytes_received": self.upstream_bytes.get(endpoint, 0),
+                "in_flight": self.upstream_in_flight.get(endpoint, 0),
+                "latency": histogram.summary(),
+                "connect": self.upstream_connect[endpoint].summary() if endpoint in self.upstream_connect else None,
+                "server": self.upstream_server[endpoint].summary() if endpoint in self.upstream_server else None,
+            }
+        return {"tools": tools, "upstream": upstream}
+
+    def render_prometheus(self, extra_counters: Dict[str, Dict[str, Any]]) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histograms(name: str, help_text: str, label: str, values: Dict[str, Histogram]) -> None:
+            header(name, "histogram", help_text)
+            for key, histogram in sorted(values.items()):
+                lines.extend(histogram.prometheus_lines(name, f'{label}="{key}"'))
+
+        def counters(name: str, kind: str, help_text: str, labels: Tuple[str, ...], values: Dict[Any, Any]) -> None:
+            header(name, kind, help_text)
+            for key, value in sorted(values.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                label_text = ",".join(f'{label}="{part}"' for label, part in zip(labels, key))
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        histograms("fortiflex_tool_duration_seconds", "Tool call latency.", "tool", self.tool_latency)
+        histograms("fortiflex_tool_auth_seconds", "Time tool calls spent obtaining an OAuth token.", "tool",
+                   self.tool_auth)
+        counters("fortiflex_tool_calls_total", "counter", "Tool calls by outcome.", ("tool", "outcome"),
+                 self.tool_calls)
+        counters("fortiflex_tool_in_flight", "gauge", "Tool calls in progress.", ("tool",), self.tool_in_flight)
+        histograms("fortiflex_upstream_duration_seconds", "Upstream request latency per attempt.",
+                   "endpoint", self.upstream_latency)
+        histograms("fortiflex_upstream_connect_seconds", "TCP and TLS setup time of new upstream connections.",
+                   "endpoint", self.upstream_connect)
+        histograms("fortiflex_upstream_server_seconds", "Time from request sent to response headers received.",
+                   "endpoint", self.upstream_server)
+        counters("fortiflex_upstream_responses_total", "counter", "Upstream responses by status code.",
+                 ("endpoint", "status"), self.upstream_responses)
+        counters("fortiflex_upstream_received_bytes_total", "counter", "Upstream response bytes received.",
+                 ("endpoint",), self.upstream_bytes)
+        counters("fortiflex_upstream_retries_total", "counter", "Upstream request retries.", ("endpoint",),
+                 self.upstream_retries)
+        counters("fortiflex_upstream_in_flight", "gauge", "Upstream requests in progress.", ("endpoint",),
+                 self.upstream_in_flight)
+        for group, values in extra_counters.items():
+            for name, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"fortiflex_{group}_{name}"
+                    header(metric, "gauge", f"{group} {name.replace('_', ' ')}.")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("fortiflex_current_tool", default="")
+
+
+def instrumented(fn):
+    """Record latency, outcome and in-flight count of a tool; apply below @mcp.tool."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_tool.set(name)
+        metrics.tool_in_flight[name] = metrics.tool_in_flight.get(name, 0) + 1
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = "success"
+            return result
+        finally:
+            metrics.observe_tool(name, time.perf_counter() - started, outcome)
+            metrics.tool_in_flight[name] -= 1
+            current_tool.reset(token)
+
+    return wrapper
@@ -0,0 +1,214 @@
+"""
+Declarative configuration reconciliation: compare a desired state with
+configs/list and update only the configurations that differ.
+
+A desired state is YAML (needs the optional PyYAML package) or JSON:
+
+    configs:
+      - id: 1001                        # match by ID (the name is then updated if it differs)
+        name: branch-fgt-2cpu
+        parameters:                     # by parameter name or ID
+          FGT_VM_BUNDLE_CPU_SIZE: 2
+          FGT_VM_BUNDLE_SVC_PKG: UTP
+          FGT_VM_BUNDLE_CLOUD_SERVICES: [FGTFAMS, FGTSOCA]    # add-ons take a list
+      - name: fmg-small                 # or match by name
+        parameters: [{"id": 30, "value": "10"}, {"id": 9, "value": "1"}]
+
+The parameters of a listed config replace its current parameters; when
+`parameters` is left out only the name is reconciled. A desired state can
+be read from a file only inside FORTIFLEX_DESIRED_STATE_DIR, since in
+HTTP/SSE mode the path comes from a remote client.
+"""
+import json
+import os
+from typing import Optional, Dict, Any, List, Tuple
+
+from .catalog import CONFIG_PARAMETERS, PRODUCT_TYPE_NAMES, validate_config_parameters
+from .settings import DESIRED_STATE_DIR
+
+_PARAMETER_IDS = {spec.name: spec.id for spec in CONFIG_PARAMETERS.values()}
+
+
+def _desired_state_file(path: str) -> str:
+    """Resolve a desired-state path, relative to DESIRED_STATE_DIR, refusing anything outside it."""
+    if not DESIRED_STATE_DIR:
+        raise ValueError("Reading desired-state files is disabled; set FORTIFLEX_DESIRED_STATE_DIR to the directory "
+                         "they are read from, or pass the desired state as text")
+    root = os.path.realpath(DESIRED_STATE_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path!r} is outside FORTIFLEX_DESIRED_STATE_DIR")
+    return resolved
+
+
+def _parse(text: str, yaml_hint: bool) -> Any:
+    if not yaml_hint:
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("The desired state is not valid JSON, and reading YAML requires the 'pyyaml' package")
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid desired state: {e}")
+
+
+def _parameter_id(key: Any) -> int:
+    if isinstance(key, int) or str(key).strip().isdigit():
+        return int(key)
+    parameter_id = _PARAMETER_IDS.get(str(key).strip().upper())
+    if parameter_id is None:
+        raise ValueError(f"Unknown parameter {key!r}; see config_parameters for valid names and IDs")
+    return parameter_id
+
+
+def _parameter_list(raw: Any, where: str) -> List[Dict[str, Any]]:
+    """Normalize a parameter mapping or list to [{"id": int, "value": str}, ...]."""
+    if isinstance(raw, dict):
+        parameters = []
+        for key, value in raw.items():
+            for item in value if isinstance(value, list) else [value]:
+                parameters.append({"id": _parameter_id(key), "value": str(item)})
+        return parameters
+    if isinstance(raw, list):
+        try:
+            return [{"id": _parameter_id(item["id"]), "value": str(item["value"])} for item in raw]
+        except (KeyError, TypeError):
+            raise ValueError(f"{where}: parameters must be objects with 'id' and 'value'")
+    raise ValueError(f"{where}: parameters must be a mapping or a list")
+
+
+def load_desired_state(text: str = "", path: str = "") -> List[Dict[str, Any]]:
+    """
+    Read a desired state from text or from a file.
+
+    Returns:
+        List of {"id": int or None, "name": str or None, "parameters": list or None}.
+    """
+    if path:
+        with open(_desired_state_file(path), encoding="utf-8") as f:
+            text = f.read()
+    if not text.strip():
+        raise ValueError("Provide the desired state as text or as a file path")
+    document = _parse(text, yaml_hint=path.endswith((".yaml", ".yml")))
+    entries = document.get("configs") if isinstance(document, dict) else document
+    if not isinstance(entries, list):
+        raise ValueError("The desired state must be a list of configs or an object with a 'configs' list")
+
+    desired = []
+    for i, entry in enumerate(entries):
+        where = f"configs[{i}]"
+        if not isinstance(entry, dict) or (entry.get("id") in (None, "") and not entry.get("name")):
+            raise ValueError(f"{where}: each config needs an 'id' or a 'name'")
+        desired.append({
+            "id": int(entry["id"]) if entry.get("id") not in (None, "") else None,
+            "name": str(entry["name"]) if entry.get("name") else None,
+            "parameters": _parameter_list(entry["parameters"], where) if entry.get("parameters") is not None
+            else None,
+        })
+    return desired
+
+
+def _values_by_id(parameters: List[Dict[str, Any]]) -> Dict[int, List[str]]:
+    """Parameter values grouped by ID, ignoring add-ons set to NONE, for an order-insensitive comparison."""
+    values: Dict[int, List[str]] = {}
+    for parameter in parameters:
+        parameter_id = int(parameter["id"])
+        value = str(parameter["value"]).strip()
+        spec = CONFIG_PARAMETERS.get(parameter_id)
+        if spec is not None and spec.add_on and value == "NONE":
+            continue
+        values.setdefault(parameter_id, []).append(value)
+    return {parameter_id: sorted(items) for parameter_id, items in values.items()}
+
+
+def parameter_diff(current: List[Dict[str, Any]], desired: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The parameters whose values differ, as {"id", "name", "from", "to"}; add-ons are compared as lists."""
+    before, after = _values_by_id(current), _values_by_id(desired)
+    changes = []
+    for parameter_id in sorted(set(before) | set(after)):
+        old, new = before.get(parameter_id, []), after.get(parameter_id, [])
+        if old == new:
+            continue
+        spec = CONFIG_PARAMETERS.get(parameter_id)
+        as_list = spec is None or spec.add_on
+        changes.append({
+            "id": parameter_id,
+            "name": spec.name if spec else None,
+            "from": old if as_list else (old[0] if old else None),
+            "to": new if as_list else (new[0] if new else None),
+        })
+    return changes
+
+
+def plan_configs(desired: List[Dict[str, Any]],
+                 configs: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Compare the desired state with the current configs (one configs/list response).
+
+    Returns:
+        The plan, and the configs/update request bodies needed to apply it.
+    """
+    by_id = {int(config["id"]): config for config in configs if config.get("id") is not None}
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for config in configs:
+        by_name.setdefault(config.get("name") or "", []).append(config)
+
+    updates, unchanged, invalid, requests = [], [], [], []
+    seen = set()
+    for entry in desired:
+        label = entry["id"] if entry["id"] is not None else entry["name"]
+        config: Optional[Dict[str, Any]] = None
+        if entry["id"] is not None:
+            config = by_id.get(entry["id"])
+        elif len(by_name.get(entry["name"], [])) == 1:
+            config = by_name[entry["name"]][0]
+        elif by_name.get(entry["name"]):
+            invalid.append({"config": label, "errors": [f"More than one config is named {entry['name']!r}; use its id"]})
+            continue
+        if config is None:
+            invalid.append({"config": label, "errors": ["No such config in this program"]})
+            continue
+        config_id = int(config["id"])
+        if config_id in seen:
+            invalid.append({"config": label, "errors": [f"Config {config_id} is listed more than once"]})
+            continue
+        seen.add(config_id)
+
+        current_parameters = config.get("parameters") or []
+        parameters = entry["parameters"] if entry["parameters"] is not None else current_parameters
+        name = entry["name"] or config.get("name")
+        if entry["parameters"] is not None:
+            errors = validate_config_parameters(parameters)
+            type_id = (config.get("productType") or {}).get("id")
+            foreign = sorted({spec.name for spec in (CONFIG_PARAMETERS.get(int(p["id"])) for p in parameters)
+                              if spec is not None and type_id is not None and spec.product_type != type_id})
+            if foreign:
+                errors.append(f"Parameters {', '.join(foreign)} do not belong to product type "
+                              f"{PRODUCT_TYPE_NAMES.get(type_id, type_id)}")
+            if errors:
+                invalid.append({"config": label, "id": config_id, "errors": errors})
+                continue
+
+        changes = parameter_diff(current_parameters, parameters)
+        if not changes and name == config.get("name"):
+            unchanged.append(config_id)
+            continue
+        update: Dict[str, Any] = {"id": config_id, "name": name, "parameters": changes}
+        if name != config.get("name"):
+            update["rename"] = {"from": config.get("name"), "to": name}
+        updates.append(update)
+        requests.append({"id": config_id, "name": name, "parameters": parameters})
+
+    plan = {
+        "summary": {"configs": len(desired), "update": len(updates), "unchanged": len(unchanged),
+                    "invalid": len(invalid)},
+        "updates": updates,
+        "unchanged": unchanged,
+        "invalid": invalid,
+    }
+    return plan, requests
@@ -0,0 +1,124 @@
+"""
+Compact in-memory entitlement records.
+
+An entitlements/list item parsed as a dict costs about a kilobyte: a hash
+table plus its own copy of every key and of values such as the status and
+the day an entitlement starts or ends that most entitlements share.
+Entitlement keeps the known fields in __slots__, interns the short
+low-cardinality strings (sys.intern, so they are freed with the last record
+using them), and derives the YYYY-MM-DD days used for date filtering once,
+when the record is built. Records are converted back to dicts, with the
+fields the API returned, only when a tool returns them.
+"""
+import sys
+from typing import Optional, Dict, Any, Iterable, List, FrozenSet
+
+# entitlements/list fields kept in slots, in the API's order; any other field goes to `extra`.
+FIELDS = ("serialNumber", "description", "configId", "startDate", "endDate", "status", "token", "tokenStatus",
+          "accountId")
+
+_FIELD_NAMES = frozenset(FIELDS)
+
+# The sets of missing FIELDS seen so far, shared between records (at most 2 ** len(FIELDS) of them).
+_missing_sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+
+def _intern(value: Any) -> Any:
+    """Share one copy of a string between records; other values are kept as parsed."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _day(value: Any) -> str:
+    return sys.intern(value[:10]) if isinstance(value, str) else ""
+
+
+def _missing(data: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    if data.keys() >= _FIELD_NAMES:
+        return None
+    missing = _FIELD_NAMES.difference(data)
+    return _missing_sets.setdefault(missing, missing)
+
+
+def _extra(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if data.keys() <= _FIELD_NAMES:
+        return None
+    return {name: value for name, value in data.items() if name not in _FIELD_NAMES}
+
+
+class Entitlement:
+    """
+    One entitlement; attribute names match the API's JSON keys. A field the
+    API did not return reads as None and is left out of to_dict().
+    """
+
+    __slots__ = FIELDS + ("start_day", "end_day", "extra", "missing")
+
+    def __init__(self, serialNumber: str, description: Optional[str] = None, configId: Any = None,
+                 startDate: Optional[str] = None, endDate: Optional[str] = None, status: Optional[str] = None,
+                 token: Optional[str] = None, tokenStatus: Optional[str] = None, accountId: Any = None,
+                 extra: Optional[Dict[str, Any]] = None, missing: Optional[FrozenSet[str]] = None):
+        self.serialNumber = serialNumber
+        self.description = description
+        self.configId = _intern(configId)
+        self.startDate = startDate
+        self.endDate = endDate
+        self.status = _intern(status)
+        self.token = token
+        self.tokenStatus = _intern(tokenStatus)
+        self.accountId = _intern(accountId)
+        self.start_day = _day(startDate)
+        self.end_day = _day(endDate)
+        self.extra = extra or None
+        self.missing = missing or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Entitlement":
+        # Called once per entitlement on every sync, so the fields are set inline rather than through __init__.
+        get = data.get
+        record = cls.__new__(cls)
+        record.serialNumber = get("serialNumber")
+        record.description = get("description")
+        record.configId = _intern(get("configId"))
+        record.startDate = start = get("startDate")
+        record.endDate = end = get("endDate")
+        record.status = _intern(get("status"))
+        record.token = get("token")
+        record.tokenStatus = _intern(get("tokenStatus"))
+        record.accountId = _intern(get("accountId"))
+        record.start_day = _day(start)
+        record.end_day = _day(end)
+        record.extra = _extra(data)
+        record.missing = _missing(data)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        missing = self.missing
+        if missing is None:
+            data = {name: getattr(self, name) for name in FIELDS}
+        else:
+            data = {name: getattr(self, name) for name in FIELDS if name not in missing}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in FIELDS) + (self.extra, self.missing)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Entitlement):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Entitlement({self.serialNumber!r}, status={self.status!r}, configId={self.configId!r})"
+
+
+def entitlement_records(items: Iterable[Dict[str, Any]]) -> List[Entitlement]:
+    """Build records from entitlements/list items, skipping items without a serial number."""
+    return [Entitlement.from_dict(item) for item in items if item.get("serialNumber")]
+
+
+def to_dicts(records: Iterable[Entitlement]) -> List[Dict[str, Any]]:
+    return [record.to_dict() for record in records]
@@ -0,0 +1,102 @@
+"""
+Entry points: stdio, streamable HTTP and SSE serving of the FortiFlex MCP server.
+
+The MCP SDK and the tool modules are imported by load_tools(), not at module
+import, so argument parsing and the multi-worker supervisor stay cheap.
+"""
+import asyncio
+import os
+
+from . import settings
+from .auth import token_manager
+from .index import entitlement_index
+from .jobs import job_queue
+from .tenants import tenant_registry
+from .transport import startup_http_clients, shutdown_http_clients
+
+
+def load_tools():
+    """Import every tool module, registering its tools, and return the FastMCP instance."""
+    from . import tools  # noqa: F401
+    from .app import mcp
+    return mcp
+
+
+async def shutdown_shared_state() -> None:
+    await job_queue.close()
+    await token_manager.close()
+    await tenant_registry.close()
+    await shutdown_http_clients()
+    entitlement_index.close()
+
+
+async def serve_stdio():
+    mcp = load_tools()
+    await startup_http_clients(wait=False)
+    job_queue.start()
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        await shutdown_shared_state()
+
+
+def create_http_app():
+    """
+    Build the ASGI app for the HTTP transports. Every MCP session served by
+    this process shares the token cache, connection pools, caches, index and job
+    queue, which are opened and closed with the app's lifespan.
+    """
+    from contextlib import asynccontextmanager
+
+    mcp = load_tools()
+    mcp.settings.stateless_http = settings.HTTP_STATELESS
+    app = mcp.sse_app() if settings.TRANSPORT == "sse" else mcp.streamable_http_app()
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await startup_http_clients(wait=False)
+        job_queue.start()
+        try:
+            async with app_lifespan(app):
+                yield
+        finally:
+            await shutdown_shared_state()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="FortiFlex MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http", "sse"], default=settings.TRANSPORT,
+                        help="stdio (default), streamable HTTP, or SSE")
+    parser.add_argument("--host", default=settings.HTTP_HOST, help="address to bind in HTTP/SSE mode")
+    parser.add_argument("--port", type=int, default=settings.HTTP_PORT, help="port to bind in HTTP/SSE mode")
+    parser.add_argument("--workers", type=int, default=settings.HTTP_WORKERS, help="worker processes in HTTP mode")
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        asyncio.run(serve_stdio())
+        return
+
+    import uvicorn
+
+    settings.TRANSPORT = args.transport
+    if args.workers > 1:
+        if args.transport != "http":
+            parser.error("--workers > 1 is only supported with --transport http")
+        # Sessions cannot follow a client across processes, so each request stands alone.
+        # The workers inherit these settings through the environment.
+        os.environ["FORTIFLEX_TRANSPORT"] = "http"
+        os.environ["FORTIFLEX_HTTP_STATELESS"] = "true"
+        uvicorn.run("fortiflex_mcp.server:create_http_app", factory=True, host=args.host, port=args.port,
+                    workers=args.workers)
+    else:
+        uvicorn.run(create_http_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Server settings, read once from the environment (and a .env file) at import time.
+"""
+import os
+
+from dotenv import load_dotenv
+load_dotenv()
+
+program_sn = os.getenv('FORTIFLEX_PROGRAM_SN')
+
+api_user = os.getenv('FORTIFLEX_API_USER')
+api_password = os.getenv('FORTIFLEX_API_PASSWORD')
+account_id = os.getenv('FORTIFLEX_ACCOUNT_ID')
+
+# Optional JSON/YAML file of further tenants (API users with their account and program), see tenants.py
+TENANTS_FILE = os.getenv('FORTIFLEX_TENANTS_FILE', '')
+
+COMMON_HEADERS = {"Content-type": "application/json", "Accept": "application/json"}
+FORTIFLEX_API_BASE_URI = os.getenv('FORTIFLEX_API_BASE_URI', "https://support.fortinet.com/ES/api/fortiflex/v2/")
+FORTICARE_AUTH_URI = os.getenv('FORTICARE_AUTH_URI', "https://customerapiauth.fortinet.com/api/v1/oauth/token/")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+timeout: float = _env_float('FORTIFLEX_HTTP_TIMEOUT', 30.0)
+
+# HTTP connection pool (one pooled client per upstream host, shared by all tools)
+POOL_MAX_CONNECTIONS = _env_int('FORTIFLEX_POOL_MAX_CONNECTIONS', 100)                    # in-flight requests, all hosts
+POOL_MAX_CONNECTIONS_PER_HOST = _env_int('FORTIFLEX_POOL_MAX_CONNECTIONS_PER_HOST', 20)   # open sockets per host
+POOL_MAX_KEEPALIVE = _env_int('FORTIFLEX_POOL_MAX_KEEPALIVE', 10)                          # idle sockets kept per host
+POOL_KEEPALIVE_EXPIRY = _env_float('FORTIFLEX_POOL_KEEPALIVE_EXPIRY', 60.0)                # seconds
+HTTP2_ENABLED = _env_bool('FORTIFLEX_HTTP2', False)                                        # requires the 'h2' package
+
+# Transport (stdio for one client per process, http/sse for one shared server); CLI flags override these
+TRANSPORT = os.getenv('FORTIFLEX_TRANSPORT', 'stdio')                       # stdio, http or sse
+HTTP_HOST = os.getenv('FORTIFLEX_HOST', '127.0.0.1')
+HTTP_PORT = _env_int('FORTIFLEX_PORT', 8000)
+HTTP_WORKERS = _env_int('FORTIFLEX_WORKERS', 1)                             # >1 implies stateless HTTP
+HTTP_STATELESS = _env_bool('FORTIFLEX_HTTP_STATELESS', False)
+
+# OAuth token cache
+TOKEN_REFRESH_MARGIN = _env_float('FORTIFLEX_TOKEN_REFRESH_MARGIN', 300.0)   # refresh this many seconds before expiry
+TOKEN_DEFAULT_EXPIRES_IN = 3600.0                                           # used when the response has no expires_in
+
+# Local entitlements index
+INDEX_TTL = _env_float('FORTIFLEX_INDEX_TTL', 300.0)                        # seconds before the index is re-synced
+INDEX_DB_PATH = os.getenv('FORTIFLEX_INDEX_DB', '')                         # optional SQLite file to persist the index
+
+# Entitlement snapshots for the change feed
+SNAPSHOT_DIR = os.getenv('FORTIFLEX_SNAPSHOT_DIR',
+                         os.path.join(os.path.expanduser('~'), '.cache', 'mcp-fortiflex', 'snapshots'))
+SNAPSHOT_KEEP = _env_int('FORTIFLEX_SNAPSHOT_KEEP', 20)                     # newest snapshots kept on disk
+WATCH_INTERVAL = _env_float('FORTIFLEX_WATCH_INTERVAL', 60.0)               # seconds between entitlements_watch polls
+
+# Response cache for the read-only list endpoints (a TTL of 0 disables caching for that endpoint)
+CACHE_TTLS = {
+    "entitlements/list": _env_float('FORTIFLEX_CACHE_TTL_ENTITLEMENTS', 60.0),    # seconds
+    "configs/list": _env_float('FORTIFLEX_CACHE_TTL_CONFIGS', 300.0),             # seconds
+    "entitlements/points": _env_float('FORTIFLEX_CACHE_TTL_POINTS', 300.0),       # seconds
+}
+CACHE_MAX_ENTRIES = _env_int('FORTIFLEX_CACHE_MAX_ENTRIES', 32)
+
+# Paginated entitlements listing
+ENTITLEMENTS_PAGE_SIZE = _env_int('FORTIFLEX_PAGE_SIZE', 100)               # default page size of entitlements_list_page
+ENTITLEMENTS_MAX_PAGE_SIZE = _env_int('FORTIFLEX_MAX_PAGE_SIZE', 1000)
+PAGE_SNAPSHOT_TTL = _env_float('FORTIFLEX_PAGE_SNAPSHOT_TTL', 600.0)        # seconds a paged list is kept after a page
+PAGE_SNAPSHOT_MAX = _env_int('FORTIFLEX_PAGE_SNAPSHOTS', 8)                 # paged lists kept at once
+
+# Batch lifecycle operations
+BATCH_CONCURRENCY = _env_int('FORTIFLEX_BATCH_CONCURRENCY', 10)            # concurrent requests per batch tool call
+
+# Declarative configuration: config_plan/config_apply only read desired-state files from this directory
+DESIRED_STATE_DIR = os.getenv('FORTIFLEX_DESIRED_STATE_DIR', '')           # empty disables the path argument
+
+# Durable job queue for long-running lifecycle operations
+JOBS_DB_PATH = os.getenv('FORTIFLEX_JOBS_DB',
+                         os.path.join(os.path.expanduser('~'), '.cache', 'mcp-fortiflex', 'jobs.sqlite3'))
+JOBS_WORKERS = _env_int('FORTIFLEX_JOBS_WORKERS', 4)                        # requests in flight across all jobs
+JOBS_RETENTION = _env_float('FORTIFLEX_JOBS_RETENTION', 7 * 86400.0)        # seconds finished jobs are kept
+JOBS_POLL_INTERVAL = 1.0                                                    # seconds between idle queue checks
+
+# Client-side rate limits (token bucket; a rate of 0 disables the limit)
+AUTH_RATE_LIMIT = _env_float('FORTIFLEX_AUTH_RATE_LIMIT', 1.0)              # requests/second to FORTICARE_AUTH_URI
+AUTH_RATE_BURST = _env_int('FORTIFLEX_AUTH_RATE_BURST', 3)
+API_RATE_LIMIT = _env_float('FORTIFLEX_API_RATE_LIMIT', 10.0)               # requests/second to FORTIFLEX_API_BASE_URI
+API_RATE_BURST = _env_int('FORTIFLEX_API_RATE_BURST', 20)
+
+# Retries with exponential backoff and full jitter
+RETRY_MAX_ATTEMPTS = _env_int('FORTIFLEX_RETRY_MAX_ATTEMPTS', 3)            # retries after the first attempt
+RETRY_BACKOFF_BASE = _env_float('FORTIFLEX_RETRY_BACKOFF_BASE', 0.5)        # seconds
+RETRY_BACKOFF_MAX = _env_float('FORTIFLEX_RETRY_BACKOFF_MAX', 30.0)         # longest single wait, incl. Retry-After
+RETRY_NON_IDEMPOTENT = _env_bool('FORTIFLEX_RETRY_NON_IDEMPOTENT', False)   # also retry 5xx on stop/reactivate/update
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+IDEMPOTENT_ENDPOINTS = {"entitlements/list", "configs/list", "entitlements/points"}
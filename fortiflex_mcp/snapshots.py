@@ -0,0 +1,185 @@
+"""
+Persisted entitlement snapshots and the diff engine behind the change feed.
+
+A snapshot keeps only the serial number and the tracked fields of each
+entitlement, stored column-wise in a gzip-compressed JSON file named after
+its ID, so a 100k-entitlement account takes a few MB on disk. VM license
+tokens are never written: a snapshot holds a short SHA-256 digest of each
+token, which is enough to report that it changed.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from .records import Entitlement
+from .settings import SNAPSHOT_DIR, SNAPSHOT_KEEP
+
+# Fields compared between snapshots; a change in any of them is reported.
+SNAPSHOT_FIELDS = ("status", "token", "tokenStatus", "configId", "description", "endDate")
+
+Rows = Dict[str, Tuple[Any, ...]]
+
+_SNAPSHOT_ID = re.compile(r"\d{13,}")
+
+_TOKEN = SNAPSHOT_FIELDS.index("token")
+
+
+def token_digest(token: Optional[str]) -> Optional[str]:
+    """What a snapshot stores instead of a VM token."""
+    if token is None:
+        return None
+    return "sha256:" + hashlib.sha256(str(token).encode()).hexdigest()[:16]
+
+
+def snapshot_rows(records: List[Entitlement]) -> Rows:
+    """Reduce entitlement records to {serialNumber: (tracked field values)}, with tokens as digests."""
+    rows: Rows = {}
+    for record in records:
+        values = [getattr(record, name) for name in SNAPSHOT_FIELDS]
+        values[_TOKEN] = token_digest(values[_TOKEN])
+        rows[record.serialNumber] = tuple(values)
+    return rows
+
+
+def diff_rows(old: Rows, new: Rows) -> Dict[str, Any]:
+    """
+    Compare two snapshots keyed by serial number.
+
+    Returns:
+        Dictionary with the added and removed serial numbers, and per changed
+        serial number the fields that differ as {"field": [old, new]}.
+    """
+    added = [serial for serial in new if serial not in old]
+    removed = [serial for serial in old if serial not in new]
+    changed = []
+    for serial, values in new.items():
+        previous = old.get(serial)
+        if previous is None or previous == values:
+            continue
+        changed.append({
+            "serialNumber": serial,
+            "changes": {name: [before, after] for name, before, after in zip(SNAPSHOT_FIELDS, previous, values)
+                        if before != after},
+        })
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+class SnapshotStore:
+    """
+    Snapshots on disk, newest last, with the most recently used ones kept in memory.
+
+    Taking a snapshot identical to the latest one returns the latest ID
+    instead of writing a new file, so idle polling does not grow the store.
+    Only the newest `keep` snapshots are kept.
+    """
+
+    def __init__(self, directory: str = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP, cached: int = 4):
+        self.directory = directory
+        self.keep = max(keep, 1)
+        self.cached = cached
+        self._rows: "OrderedDict[str, Rows]" = OrderedDict()
+        self._taken_at: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    def _path(self, snapshot_id: str) -> str:
+        return os.path.join(self.directory, f"{snapshot_id}.json.gz")
+
+    def ids(self) -> List[str]:
+        """IDs of the snapshots on disk, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(".json.gz")] for name in names
+                      if name.endswith(".json.gz") and _SNAPSHOT_ID.fullmatch(name[:-len(".json.gz")]))
+
+    def latest_id(self) -> Optional[str]:
+        ids = self.ids()
+        return ids[-1] if ids else None
+
+    def _remember(self, snapshot_id: str, rows: Rows) -> None:
+        self._rows[snapshot_id] = rows
+        self._rows.move_to_end(snapshot_id)
+        while len(self._rows) > self.cached:
+            self._rows.popitem(last=False)
+
+    def _read(self, snapshot_id: str) -> Rows:
+        with gzip.open(self._path(snapshot_id), "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self._taken_at[snapshot_id] = data["taken_at"]
+        # Fields missing from an older snapshot compare as None.
+        missing = [None] * len(data["serials"])
+        columns = [data["columns"].get(name, missing) for name in SNAPSHOT_FIELDS]
+        if not data.get("token_digests"):               # written before tokens were stored as digests
+            columns[_TOKEN] = [token_digest(token) for token in columns[_TOKEN]]
+        return dict(zip(data["serials"], zip(*columns)))
+
+    def _write(self, snapshot_id: str, rows: Rows, taken_at: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        serials = list(rows)
+        data = {
+            "id": snapshot_id,
+            "taken_at": taken_at,
+            "fields": list(SNAPSHOT_FIELDS),
+            "token_digests": True,
+            "serials": serials,
+            "columns": {name: [rows[serial][i] for serial in serials] for i, name in enumerate(SNAPSHOT_FIELDS)},
+        }
+        path = self._path(snapshot_id)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        for old_id in self.ids()[:-self.keep]:
+            os.remove(self._path(old_id))
+            self._rows.pop(old_id, None)
+            self._taken_at.pop(old_id, None)
+
+    async def load(self, snapshot_id: str) -> Rows:
+        """Return the rows of a snapshot; raises ValueError for an unknown ID."""
+        rows = self._rows.get(snapshot_id)
+        if rows is not None:
+            self._rows.move_to_end(snapshot_id)
+            return rows
+        if not _SNAPSHOT_ID.fullmatch(snapshot_id or "") or not os.path.exists(self._path(snapshot_id)):
+            raise ValueError(f"Unknown snapshot {snapshot_id!r}; it may have been pruned. "
+                             f"Call again without a snapshot ID to start from the current state.")
+        rows = await asyncio.to_thread(self._read, snapshot_id)
+        self._remember(snapshot_id, rows)
+        return rows
+
+    def taken_at(self, snapshot_id: str) -> Optional[float]:
+        return self._taken_at.get(snapshot_id)
+
+    async def take(self, rows: Rows) -> Tuple[str, bool]:
+        """
+        Persist rows as a new snapshot unless they equal the latest one.
+
+        Returns:
+            The snapshot ID and whether a new snapshot was written.
+        """
+        async with self._lock:
+            latest = self.latest_id()
+            if latest is not None and await self.load(latest) == rows:
+                return latest, False
+            snapshot_id = str(time.time_ns() // 1_000_000)
+            if latest is not None and snapshot_id <= latest:
+                snapshot_id = str(int(latest) + 1)
+            taken_at = time.time()
+            await asyncio.to_thread(self._write, snapshot_id, rows, taken_at)
+            self._taken_at[snapshot_id] = taken_at
+            self._remember(snapshot_id, rows)
+            return snapshot_id, True
+
+    def summary(self) -> Dict[str, Any]:
+        ids = self.ids()
+        return {"directory": self.directory, "snapshots": len(ids), "latest": ids[-1] if ids else None,
+                "keep": self.keep}
+
+
+snapshot_store = SnapshotStore()
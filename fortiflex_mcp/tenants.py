@@ -0,0 +1,159 @@
+"""
+Tenant registry: several FortiFlex accounts and programs served by one process.
+
+FORTIFLEX_TENANTS_FILE names a JSON file (or a .yaml/.yml file when PyYAML
+is installed) listing the extra tenants:
+
+    {"tenants": [
+        {"name": "acme", "api_user": "...", "api_password_env": "ACME_FORTIFLEX_PASSWORD",
+         "account_id": 1234567, "program_sn": "ELAVMS0000001234"}
+    ]}
+
+Every tenant needs its own program_sn; account_id is optional and is
+never taken from another tenant. The password is read from the named
+environment variable, or given inline as api_password. The FORTIFLEX_API_USER/... settings are the "default"
+tenant. Every other tenant gets its own token cache, connection pools and
+API rate limiter, selected for the duration of a call through current_tenant.
+"""
+import asyncio
+import contextvars
+import json
+import os
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from . import auth, transport
+from .settings import API_RATE_LIMIT, API_RATE_BURST, TENANTS_FILE, api_user, api_password, account_id, program_sn
+
+DEFAULT_TENANT = "default"
+
+# The tenant whose credentials, pools and rate limiter the current request uses; None for the default tenant.
+current_tenant: contextvars.ContextVar[Optional["Tenant"]] = contextvars.ContextVar("fortiflex_current_tenant",
+                                                                                   default=None)
+
+
+class Tenant:
+    """One FortiFlex API user with the account and program it manages."""
+
+    def __init__(self, name: str, api_user: Optional[str], api_password: Optional[str], account_id: Any,
+                 program_sn: Optional[str]):
+        self.name = name
+        self.api_user = api_user
+        self.account_id = account_id
+        self.program_sn = program_sn
+        if name == DEFAULT_TENANT:
+            self.token_manager = auth.token_manager
+            self.api_rate_limiter = transport.api_rate_limiter
+        else:
+            self.token_manager = auth.TokenManager(api_user, api_password)
+            self.api_rate_limiter = transport.TokenBucket(API_RATE_LIMIT, API_RATE_BURST)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"account_id": self.account_id, "program_sn": self.program_sn,
+                "token_cached": self.token_manager.access_token is not None}
+
+
+class TenantRegistry:
+    """The default tenant plus the tenants of the tenants file, loaded on first use."""
+
+    def __init__(self, path: str = TENANTS_FILE):
+        self.path = path
+        self._tenants: Optional[Dict[str, Tenant]] = None
+
+    def _load(self) -> Dict[str, Tenant]:
+        if self._tenants is not None:
+            return self._tenants
+        tenants: Dict[str, Tenant] = {}
+        if api_user:
+            tenants[DEFAULT_TENANT] = Tenant(DEFAULT_TENANT, api_user, api_password, account_id, program_sn)
+        for i, entry in enumerate(_read_tenants_file(self.path) if self.path else []):
+            where = f"{self.path}: tenants[{i}]"
+            if not isinstance(entry, dict) or not all(entry.get(field) for field in ("name", "api_user", "program_sn")):
+                raise ValueError(f"{where}: each tenant needs a 'name', an 'api_user' and a 'program_sn'")
+            name = str(entry["name"])
+            if name in (DEFAULT_TENANT, "all") or name in tenants:
+                raise ValueError(f"{where}: the tenant name {name!r} is reserved or used twice")
+            password = entry.get("api_password")
+            if entry.get("api_password_env"):
+                password = os.getenv(entry["api_password_env"])
+                if password is None:
+                    raise ValueError(f"{where}: environment variable {entry['api_password_env']} is not set")
+            tenants[name] = Tenant(name, str(entry["api_user"]), password, entry.get("account_id"),
+                                   str(entry["program_sn"]))
+        self._tenants = tenants
+        return tenants
+
+    def names(self) -> List[str]:
+        return list(self._load())
+
+    def get(self, name: str) -> Tenant:
+        tenant = self._load().get(name)
+        if tenant is None:
+            raise ValueError(f"Unknown tenant {name!r}; configured tenants: {', '.join(self.names()) or 'none'}")
+        return tenant
+
+    def select(self, selector: str) -> List[Tenant]:
+        """Tenants named by a selector: one name, a comma-separated list, or "all"."""
+        if selector.strip().lower() == "all":
+            return list(self._load().values())
+        names = list(dict.fromkeys(name.strip() for name in selector.split(",") if name.strip()))
+        return [self.get(name) for name in names]
+
+    async def close(self) -> None:
+        for tenant in (self._tenants or {}).values():
+            if tenant.name != DEFAULT_TENANT:
+                await tenant.token_manager.close()
+
+    def summary(self) -> Dict[str, Any]:
+        try:
+            tenants = self._load()
+        except (OSError, ValueError) as e:
+            return {"file": self.path or None, "error": str(e)}
+        return {"file": self.path or None, "tenants": {name: tenant.summary() for name, tenant in tenants.items()}}
+
+
+def _read_tenants_file(path: str) -> List[Any]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: reading a YAML tenants file requires the 'pyyaml' package")
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+    tenants = document.get("tenants") if isinstance(document, dict) else document
+    if not isinstance(tenants, list):
+        raise ValueError(f"{path}: expected a list of tenants or an object with a 'tenants' list")
+    return tenants
+
+
+tenant_registry = TenantRegistry()
+
+
+async def fan_out(selector: str, call: Callable[[Tenant], Awaitable[Dict[str, Any]]], key: str) -> Dict[str, Any]:
+    """
+    Run call once per selected tenant, concurrently, each with that tenant's
+    token, pools and rate limiter, and merge the `key` lists of the results.
+    Every merged item is tagged with its tenant; a tenant that fails is
+    reported under "tenants" without failing the others.
+    """
+    selected = tenant_registry.select(selector)
+
+    async def run(tenant: Tenant) -> Dict[str, Any]:
+        # Each gathered call runs in its own task, so the tenant is only set for this call.
+        current_tenant.set(tenant if tenant.name != DEFAULT_TENANT else None)
+        return await call(tenant)
+
+    results = await asyncio.gather(*(run(tenant) for tenant in selected), return_exceptions=True)
+    merged: List[Dict[str, Any]] = []
+    summary: Dict[str, Any] = {}
+    for tenant, result in zip(selected, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            summary[tenant.name] = {"error": transport.describe_error(result)}
+            continue
+        items = result.get(key) or []
+        merged.extend({**item, "tenant": tenant.name} for item in items)
+        summary[tenant.name] = {"count": len(items)}
+    return {key: merged, "count": len(merged), "tenants": summary}
@@ -0,0 +1,4 @@
+"""
+MCP tools, one module per area. Importing this package registers all of them.
+"""
+from . import auth, entitlements, changes, batch, configs, jobs, stats  # noqa: F401
@@ -0,0 +1,46 @@
+"""
+Token tool.
+"""
+import logging
+from typing import Dict, Any
+
+from ..app import mcp
+from ..auth import token_manager
+from ..metrics import instrumented
+from ..settings import COMMON_HEADERS, FORTICARE_AUTH_URI, api_user, api_password
+from ..transport import make_request
+
+
+@mcp.tool(description='Get a Fortiflex toekn.')
+@instrumented
+async def generate_token(api_user=api_user, api_password=api_password
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex account to generate a token.
+
+    Args:
+        api_user: API username
+        api_password: API Password
+
+    Returns:
+        Dictionary containing tokens.    
+    """
+    logging.debug("--> Token...")
+
+    if api_user == token_manager.api_user and api_password == token_manager.api_password:
+        await token_manager.get_token()
+        return token_manager.token_response()
+
+    uri = FORTICARE_AUTH_URI
+    headers = COMMON_HEADERS.copy()
+
+    body = {
+        'username': api_user,  
+        'password': api_password,
+        'client_id': 'flexvm',
+        'grant_type': 'password'
+    }
+
+    response = await make_request(uri, body, headers=headers)
+    logging.debug(f"Response: {response}")
+    return response
@@ -0,0 +1,120 @@
+"""
+Batch lifecycle tools that act on many entitlements concurrently.
+"""
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+
+from ..app import mcp
+from ..cache import entitlements_changed
+from ..index import entitlement_index
+from ..metrics import instrumented
+from ..settings import COMMON_HEADERS, FORTIFLEX_API_BASE_URI, BATCH_CONCURRENCY
+from ..transport import make_request, describe_error
+
+
+@mcp.tool(description='Stop the VM license for many FortiFlex entitlements at once, by serial numbers or by config ID/status filter.')
+@instrumented
+async def entitlements_stop_batch(access_token, serial_numbers: Optional[List[str]] = None, config_id: str = "",
+                                  status: str = "", concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Stop several entitlements concurrently. Failures are reported per serial
+    number and do not abort the rest of the batch.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_numbers: Serial numbers to stop
+        config_id: Stop every entitlement of this configuration (used when serial_numbers is empty)
+        status: Stop every entitlement with this status (used when serial_numbers is empty)
+        concurrency: Maximum number of requests in flight
+    Returns:
+        Dictionary with success/failure counts and a result per serial number.
+    """
+    logging.debug("--> Stopping FortiFlex VM Licenses in batch ...")
+
+    serials = await _resolve_serials(access_token, serial_numbers, config_id, status)
+    return await _run_batch("entitlements/stop", access_token, serials, concurrency)
+
+@mcp.tool(description='Reactivate the VM license for many FortiFlex entitlements at once, by serial numbers or by config ID/status filter.')
+@instrumented
+async def entitlements_reactivate_batch(access_token, serial_numbers: Optional[List[str]] = None, config_id: str = "",
+                                        status: str = "", concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Reactivate several entitlements concurrently. Failures are reported per
+    serial number and do not abort the rest of the batch.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_numbers: Serial numbers to reactivate
+        config_id: Reactivate every entitlement of this configuration (used when serial_numbers is empty)
+        status: Reactivate every entitlement with this status (used when serial_numbers is empty)
+        concurrency: Maximum number of requests in flight
+    Returns:
+        Dictionary with success/failure counts and a result per serial number.
+    """
+    logging.debug("--> Reactivating FortiFlex VM Licenses in batch ...")
+
+    serials = await _resolve_serials(access_token, serial_numbers, config_id, status)
+    return await _run_batch("entitlements/reactivate", access_token, serials, concurrency)
+
+@mcp.tool(description='Regenerate the VM license token for many FortiFlex entitlements at once, by serial numbers or by config ID/status filter.')
+@instrumented
+async def entitlements_vm_token_batch(access_token, serial_numbers: Optional[List[str]] = None, config_id: str = "",
+                                      status: str = "", concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Regenerate the VM license token of several entitlements concurrently.
+    Failures are reported per serial number and do not abort the rest of the batch.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_numbers: Serial numbers whose token should be regenerated
+        config_id: Regenerate every entitlement of this configuration (used when serial_numbers is empty)
+        status: Regenerate every entitlement with this status (used when serial_numbers is empty)
+        concurrency: Maximum number of requests in flight
+    Returns:
+        Dictionary with success/failure counts and a result per serial number.
+    """
+    logging.debug("--> Regenerating FortiFlex VM License Tokens in batch ...")
+
+    serials = await _resolve_serials(access_token, serial_numbers, config_id, status)
+    return await _run_batch("entitlements/vm/token", access_token, serials, concurrency)
+
+
+async def _resolve_serials(access_token: str, serial_numbers: Optional[List[str]], config_id: Any,
+                           status: str) -> List[str]:
+    """Return the serial numbers a batch tool should act on, de-duplicated and in order."""
+    if serial_numbers:
+        return list(dict.fromkeys(serial_numbers))
+    if config_id in (None, "") and not status:
+        raise ValueError("Provide serial_numbers, or a config_id and/or status filter")
+    await entitlement_index.ensure_fresh(access_token)
+    return [record.serialNumber for record in entitlement_index.query(status=status, config_id=config_id)]
+
+
+async def _run_batch(endpoint: str, access_token: str, serials: List[str], concurrency: int) -> Dict[str, Any]:
+    """POST {"serialNumber": ...} to endpoint for every serial, at most concurrency at a time."""
+    uri = FORTIFLEX_API_BASE_URI + endpoint
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+    async def run_one(serial: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                response = await make_request(uri, {"serialNumber": serial}, COMMON_HEADERS.copy(),
+                                               access_token=access_token)
+                return {"serialNumber": serial, "success": True, "response": response}
+            except Exception as e:
+                return {"serialNumber": serial, "success": False, "error": describe_error(e)}
+
+    results = await asyncio.gather(*(run_one(serial) for serial in serials))
+    if results:
+        entitlements_changed()
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
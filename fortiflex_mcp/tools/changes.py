@@ -0,0 +1,115 @@
+"""
+Change feed: what was added, removed or changed since a persisted snapshot.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from mcp.server.fastmcp import Context
+
+from ..app import mcp
+from ..index import entitlement_index
+from ..metrics import instrumented
+from ..settings import WATCH_INTERVAL
+from ..snapshots import SNAPSHOT_FIELDS, Rows, snapshot_store, snapshot_rows, diff_rows
+
+
+async def _current_rows(access_token: str, refresh: bool) -> Rows:
+    if refresh:
+        await entitlement_index.refresh(access_token, force=True)
+    else:
+        await entitlement_index.ensure_fresh(access_token)
+    return snapshot_rows(entitlement_index.query())
+
+
+def _describe_delta(old: Rows, new: Rows) -> Dict[str, Any]:
+    """diff_rows() with the full record of each added entitlement and the last known state of each removed one."""
+    delta = diff_rows(old, new)
+    added = [entitlement_index.get(serial) for serial in delta["added"]]
+    delta["added"] = [record.to_dict() if record is not None else {"serialNumber": serial}
+                      for serial, record in zip(delta["added"], added)]
+    delta["removed"] = [{"serialNumber": serial, **dict(zip(SNAPSHOT_FIELDS, old[serial]))}
+                        for serial in delta["removed"]]
+    return delta
+
+
+@mcp.tool(description='Return only the FortiFlex entitlements added, removed or changed (status, token, config, ...) since a snapshot ID. Call without since_snapshot to get a starting snapshot ID.')
+@instrumented
+async def entitlements_changes(access_token, since_snapshot: str = "", refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Snapshot the entitlements and diff them, by serial number, against an earlier snapshot.
+    Pass the returned snapshot_id as since_snapshot on the next call.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        since_snapshot: Snapshot ID returned by a previous call; empty to only take a snapshot
+        refresh: Re-sync from the API first instead of using an index younger than FORTIFLEX_INDEX_TTL
+    Returns:
+        Dictionary with the new snapshot_id and the added, removed and changed entitlements.
+    """
+    logging.debug("--> Diffing FortiFlex entitlements against a snapshot ...")
+
+    previous = await snapshot_store.load(since_snapshot) if since_snapshot else None
+    rows = await _current_rows(access_token, refresh)
+    snapshot_id, _ = await snapshot_store.take(rows)
+    delta = _describe_delta(previous, rows) if previous is not None else {"added": [], "removed": [], "changed": []}
+    return {
+        "snapshot_id": snapshot_id,
+        "since_snapshot": since_snapshot or None,
+        "entitlements": len(rows),
+        **delta,
+    }
+
+
+@mcp.tool(description='Watch FortiFlex entitlements: poll the API on an interval and push only the changes as log notifications until the duration ends or, optionally, the first change.')
+@instrumented
+async def entitlements_watch(access_token, since_snapshot: str = "", interval: float = WATCH_INTERVAL,
+                             duration: float = 300.0, stop_on_change: bool = False, ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Re-sync the entitlements every interval seconds and diff each sync against
+    the previous one. Every non-empty delta is sent to the client as a
+    notifications/message (logger "fortiflex.entitlements") as soon as it is
+    seen, and all deltas are returned at the end.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        since_snapshot: Snapshot ID to diff the first poll against; empty to start from the current state
+        interval: Seconds between polls (at least 1)
+        duration: Seconds to watch for (at most 3600)
+        stop_on_change: Return as soon as a change is seen
+    Returns:
+        Dictionary with the last snapshot_id, the number of polls and the deltas seen.
+    """
+    logging.debug("--> Watching FortiFlex entitlements ...")
+
+    interval = max(float(interval), 1.0)
+    duration = min(max(float(duration), 0.0), 3600.0)
+    previous_id: Optional[str] = since_snapshot or None
+    previous = await snapshot_store.load(since_snapshot) if since_snapshot else None
+    started = time.monotonic()
+    deltas = []
+    polls = 0
+    while True:
+        rows = await _current_rows(access_token, refresh=True)
+        polls += 1
+        snapshot_id, _ = await snapshot_store.take(rows)
+        if previous is not None:
+            delta = _describe_delta(previous, rows)
+            if delta["added"] or delta["removed"] or delta["changed"]:
+                event = {"snapshot_id": snapshot_id, "since_snapshot": previous_id, **delta}
+                deltas.append(event)
+                if ctx is not None:
+                    await ctx.session.send_log_message(level="info", data=event, logger="fortiflex.entitlements",
+                                                       related_request_id=ctx.request_id)
+        previous, previous_id = rows, snapshot_id
+        elapsed = time.monotonic() - started
+        if ctx is not None:
+            await ctx.report_progress(min(elapsed, duration), duration)
+        if (stop_on_change and deltas) or elapsed + interval > duration:
+            break
+        await asyncio.sleep(interval)
+
+    return {"snapshot_id": previous_id, "polls": polls, "deltas": deltas}
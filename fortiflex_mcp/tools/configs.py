@@ -0,0 +1,197 @@
+"""
+Configuration tools. The parameter catalog is imported when a tool first needs it.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, List
+
+from ..app import mcp
+from ..cache import response_cache
+from ..metrics import instrumented
+from ..settings import COMMON_HEADERS, FORTIFLEX_API_BASE_URI, BATCH_CONCURRENCY, program_sn
+from ..tenants import fan_out
+from ..transport import make_request, describe_error
+
+
+@mcp.tool(description='List all FortiFlex configurations for a given program serial ')
+@instrumented
+async def config_list(access_token, program_sn=program_sn, refresh: bool = False, tenant: str = ""
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex API to list all configuration is available
+    Responses are cached for FORTIFLEX_CACHE_TTL_CONFIGS seconds.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        program_serial_number: Program serial number
+        refresh: Bypass the cache and fetch from the API
+        tenant: Tenant name, comma-separated names or "all" to list the configurations of those tenants'
+            programs concurrently and merge them (empty for the default tenant only)
+    Returns:
+        Dictionary containing the configurations.    
+    """
+    if tenant:
+        logging.debug(f"--> Listing Fortiflex configurations for tenants {tenant} ...")
+        return await fan_out(tenant, lambda t: _fetch_configs("", t.program_sn, refresh), "configs")
+    logging.debug("--> Listing all Fortiflex configurations ...")
+
+    return await _fetch_configs(access_token, program_sn, refresh)
+
+
+async def _fetch_configs(access_token: str, program_sn: Any, refresh: bool = False) -> Dict[str, Any]:
+    """configs/list through the response cache, without counting a config_list tool call."""
+    uri = FORTIFLEX_API_BASE_URI + "configs/list"
+    headers = COMMON_HEADERS.copy()
+
+    body = {
+        "programSerialNumber": program_sn,
+    }
+    if refresh:
+        response_cache.invalidate("configs/list")
+    return await response_cache.get_or_fetch(
+        "configs/list", body, lambda: make_request(uri, body, headers, access_token=access_token))
+
+
+@mcp.tool(description='List the valid FortiFlex configuration parameters (IDs, ranges and allowed codes) per product type.')
+@instrumented
+async def config_parameters(product_type: str = ""
+) -> Dict[str, Any]:
+    """
+    Return the local parameter registry used to validate update_config.
+
+    Args:
+        product_type: Product type ID or name (e.g. 1 or FGT_VM_BUNDLE); empty for all product types
+    Returns:
+        Dictionary mapping product type names to their ID and parameter specifications.
+    """
+    logging.debug("--> Listing FortiFlex configuration parameters ...")
+    from ..catalog import PRODUCT_TYPE_NAMES, PRODUCT_TYPE_PARAMETERS, product_type_id
+
+    type_id = product_type_id(product_type)
+    type_ids = [type_id] if type_id is not None else list(PRODUCT_TYPE_NAMES)
+    return {
+        PRODUCT_TYPE_NAMES[type_id]: {
+            "id": type_id,
+            "parameters": [spec.to_dict() for spec in PRODUCT_TYPE_PARAMETERS.get(type_id, ())],
+        }
+        for type_id in type_ids if type_id in PRODUCT_TYPE_NAMES
+    }
+
+@mcp.tool(description='Update FortiFlex configuration with custom parameters. Parameters are validated locally first; see config_parameters for valid IDs and values.')
+@instrumented
+async def update_config(access_token, config_id, name, parameters: List[Dict[str, Any]], validate: bool = True
+) -> Dict[str, Any]:
+    """
+    Perform POST request to update a FortiFlex configuration with any parameters.
+
+    access_token: Bearer token for authentication (empty to use the cached server token)
+        config_id: Configuration ID to be updated
+        name: Name of the configuration
+        parameters: List of parameter objects with 'id' and 'value' keys
+                   Example: [{"id": 6, "value": "4"}, {"id": 8, "value": "ASET"}]
+        validate: Check the parameters against the local registry before calling the API
+
+    Returns:
+        Dictionary containing the API response.    
+    """
+    logging.debug("--> Updating the configurations ...")
+
+    if validate:
+        from ..catalog import validate_config_parameters
+        errors = validate_config_parameters(parameters)
+        if errors:
+            raise ValueError("Invalid configuration parameters: " + "; ".join(errors))
+
+    uri = FORTIFLEX_API_BASE_URI + "configs/update"
+    headers = COMMON_HEADERS.copy()
+
+    body = {
+        "id": config_id,
+        "name": name,
+        "parameters": parameters,
+    }
+
+    response = await make_request(uri, body, headers, access_token=access_token)
+    response_cache.invalidate("configs/list")
+    return response
+
+
+async def _plan(access_token: str, desired: str, path: str, program_sn: Any):
+    from ..reconcile import load_desired_state, plan_configs
+    entries = load_desired_state(desired, path)
+    # One fresh configs/list is the whole read cost of a plan, however many configs it covers.
+    configs = await _fetch_configs(access_token, program_sn, refresh=True)
+    return plan_configs(entries, configs.get("configs") or [])
+
+
+@mcp.tool(description='Dry run: compare a desired state (YAML/JSON text or file of configs and parameters) with the current FortiFlex configurations and show the minimal set of updates.')
+@instrumented
+async def config_plan(access_token, desired: str = "", path: str = "", program_sn=program_sn
+) -> Dict[str, Any]:
+    """
+    Compute the updates needed to reach a desired state without applying them.
+    See fortiflex_mcp/reconcile.py for the desired-state format.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        desired: Desired state as YAML or JSON text
+        path: Desired-state file inside FORTIFLEX_DESIRED_STATE_DIR (used when desired is empty)
+        program_sn: Program serial number whose configurations are compared
+    Returns:
+        Dictionary with a summary and the updates, unchanged and invalid configs.
+    """
+    logging.debug("--> Planning FortiFlex configuration changes ...")
+
+    plan, _ = await _plan(access_token, desired, path, program_sn)
+    return plan
+
+
+@mcp.tool(description='Apply a desired state (YAML/JSON text or file) to FortiFlex configurations: update only the configs that differ, concurrently. Use dry_run or config_plan to preview.')
+@instrumented
+async def config_apply(access_token, desired: str = "", path: str = "", program_sn=program_sn,
+                       dry_run: bool = False, concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Plan against a fresh configs/list, then send configs/update for every
+    config that differs, at most concurrency at a time and within the API
+    rate limit. Invalid configs are reported and skipped; a failed update
+    does not stop the others.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        desired: Desired state as YAML or JSON text
+        path: Desired-state file inside FORTIFLEX_DESIRED_STATE_DIR (used when desired is empty)
+        program_sn: Program serial number whose configurations are reconciled
+        dry_run: Only return the plan
+        concurrency: Maximum number of updates in flight
+    Returns:
+        Dictionary with the plan and, unless dry_run, a result per updated config.
+    """
+    logging.debug("--> Applying FortiFlex configuration changes ...")
+
+    plan, requests = await _plan(access_token, desired, path, program_sn)
+    if dry_run:
+        return {**plan, "dry_run": True}
+
+    uri = FORTIFLEX_API_BASE_URI + "configs/update"
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+    async def apply_one(body: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                await make_request(uri, body, COMMON_HEADERS.copy(), access_token=access_token)
+                return {"id": body["id"], "name": body["name"], "success": True}
+            except Exception as e:
+                return {"id": body["id"], "name": body["name"], "success": False, "error": describe_error(e)}
+
+    results = await asyncio.gather(*(apply_one(body) for body in requests))
+    if results:
+        response_cache.invalidate("configs/list")
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        **plan,
+        "dry_run": False,
+        "applied": {"total": len(results), "succeeded": succeeded, "failed": len(results) - succeeded},
+        "results": results,
+    }
+
@@ -0,0 +1,359 @@
+"""
+Entitlement listing, lookup, aggregation and lifecycle tools.
+"""
+import logging
+from datetime import date
+from typing import Optional, Dict, Any, List
+
+from .. import settings
+from ..aggregate import AGGREGATE_KEYS, aggregate_entitlements, entitlement_points
+from ..app import mcp
+from ..cache import response_cache, entitlements_changed, page_snapshots
+from ..index import entitlement_index
+from ..metrics import instrumented
+from ..records import Entitlement, entitlement_records, to_dicts
+from ..settings import (COMMON_HEADERS, FORTIFLEX_API_BASE_URI, ENTITLEMENTS_PAGE_SIZE, ENTITLEMENTS_MAX_PAGE_SIZE,
+                        account_id, program_sn)
+from ..tenants import fan_out
+from ..transport import make_request, stream_json_items
+
+
+@mcp.tool(description='Get all existing entitlements on FortiFlex for a given account ID or program serial number.')
+@instrumented
+async def entitlements_list(access_token, program_sn=program_sn, account_id=account_id, refresh: bool = False,
+                            tenant: str = ""
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex Entitlements List API.
+    The body must include the following parameters:
+    - account_id: (int) Account ID to filter entitlements
+    - programSerialNumber: (string) Program Serial Number to filter entitlements
+    Responses are cached for FORTIFLEX_CACHE_TTL_ENTITLEMENTS seconds.
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        program_sn: Program Serial Number to filter entitlements
+        account_id: Account ID to filter entitlements
+        refresh: Bypass the cache and fetch from the API
+        tenant: Tenant name, comma-separated names or "all" to query those tenants concurrently with their
+            own credentials, account and program and merge the results (empty for the default tenant only)
+    Returns:
+        Dictionary containing all existing entitlements.    
+    """
+    if tenant:
+        logging.debug(f"--> List FortiFlex Entitlements for tenants {tenant}...")
+        # Each tenant is queried with its own program and account only, never with the default tenant's.
+        return await fan_out(tenant, lambda t: _fetch_entitlements("", t.program_sn, t.account_id, refresh),
+                             "entitlements")
+    logging.debug("--> List FortiFlex Entitlements...")
+
+    return await _fetch_entitlements(access_token, program_sn, account_id, refresh)
+
+async def _fetch_entitlements(access_token: str, program_sn: Any, account_id: Any,
+                              refresh: bool = False) -> Dict[str, Any]:
+    """entitlements/list through the response cache, without counting an entitlements_list tool call."""
+    body = {
+        "accountId": account_id,
+        "programSerialNumber": program_sn,
+    }
+    uri = FORTIFLEX_API_BASE_URI + "entitlements/list"
+    headers = COMMON_HEADERS.copy()
+
+    if refresh:
+        response_cache.invalidate("entitlements/list")
+    return await response_cache.get_or_fetch(
+        "entitlements/list", body, lambda: make_request(uri, body, headers=headers, access_token=access_token))
+
+@mcp.tool(description='List FortiFlex entitlements one page at a time, optionally filtered and projected to selected fields. Use next_cursor to fetch the following page; all pages come from the same snapshot of the list.')
+@instrumented
+async def entitlements_list_page(access_token, cursor: str = "", page_size: int = ENTITLEMENTS_PAGE_SIZE,
+                                 fields: Optional[List[str]] = None, status: str = "", config_id: str = "",
+                                 program_sn=program_sn, account_id=account_id
+) -> Dict[str, Any]:
+    """
+    Return a single page of entitlements from a snapshot of the list taken
+    on the first page. The snapshot is the local entitlements index for the
+    default program and account, or entitlements/list parsed into compact
+    records otherwise; later pages read from the same snapshot, so they
+    neither download the list again nor shift when it changes meanwhile.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        cursor: Value of next_cursor from the previous page; empty for the first page
+        page_size: Number of entitlements per page (max ENTITLEMENTS_MAX_PAGE_SIZE)
+        fields: Entitlement fields to return, e.g. ["serialNumber", "status", "configId"]; all fields when empty
+        status: Only return entitlements with this status
+        config_id: Only return entitlements of this configuration
+        program_sn: Program Serial Number to filter entitlements
+        account_id: Account ID to filter entitlements
+    Returns:
+        Dictionary containing the page of entitlements and next_cursor (None on the last page).
+    """
+    logging.debug("--> Listing a page of FortiFlex Entitlements...")
+
+    page_size = min(max(int(page_size), 1), ENTITLEMENTS_MAX_PAGE_SIZE)
+    status = status.upper()
+    config_id = str(config_id) if config_id not in (None, "") else ""
+
+    if cursor:
+        snapshot_id, _, position = cursor.partition(":")
+        if not position.isdigit():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        records = page_snapshots.get(snapshot_id)
+        if records is None:
+            raise ValueError("The cursor has expired (lists are kept FORTIFLEX_PAGE_SNAPSHOT_TTL seconds after "
+                             "their last page); start again with an empty cursor")
+        position = int(position)
+    else:
+        if program_sn == settings.program_sn and account_id == settings.account_id:
+            await entitlement_index.ensure_fresh(access_token)
+            records = entitlement_index.query()
+        else:
+            body = {
+                "accountId": account_id,
+                "programSerialNumber": program_sn,
+            }
+            uri = FORTIFLEX_API_BASE_URI + "entitlements/list"
+            items = stream_json_items(uri, body, "entitlements", access_token)
+            try:
+                records = [Entitlement.from_dict(item) async for item in items if item.get("serialNumber")]
+            finally:
+                await items.aclose()
+        snapshot_id = page_snapshots.add(records)
+        position = 0
+
+    page = []
+    next_cursor = None
+    for position in range(position, len(records)):
+        record = records[position]
+        if status and (record.status or "").upper() != status:
+            continue
+        if config_id and str(record.configId) != config_id:
+            continue
+        if len(page) == page_size:
+            next_cursor = f"{snapshot_id}:{position}"
+            break
+        data = record.to_dict()
+        page.append({name: data.get(name) for name in fields} if fields else data)
+
+    return {
+        "entitlements": page,
+        "count": len(page),
+        "next_cursor": next_cursor,
+    }
+
+@mcp.tool(description='Look up one FortiFlex entitlement by serial number from the local entitlements index.')
+@instrumented
+async def entitlements_get(access_token, serial_number, refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Return a single entitlement from the local index without fetching the whole list.
+    The index is re-synced from entitlements/list when it is older than FORTIFLEX_INDEX_TTL.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_number: Serial number of the entitlement
+        refresh: Force a re-sync of the index before the lookup
+    Returns:
+        Dictionary containing the entitlement, or None when the serial number is unknown.
+    """
+    logging.debug("--> Looking up a FortiFlex entitlement ...")
+
+    if refresh:
+        await entitlement_index.refresh(access_token, force=True)
+    else:
+        await entitlement_index.ensure_fresh(access_token)
+    record = entitlement_index.get(serial_number)
+    return {"entitlement": record.to_dict() if record is not None else None}
+
+@mcp.tool(description='Find FortiFlex entitlements by status, config ID and/or description using the local entitlements index.')
+@instrumented
+async def entitlements_query(access_token, status: str = "", config_id: str = "", description: str = "",
+                             description_contains: str = "", refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Filter entitlements from the local index. Filters are combined with AND;
+    status, config_id and description are exact (case-insensitive) matches.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        status: Entitlement status, e.g. ACTIVE, STOPPED, PENDING, EXPIRED
+        config_id: Configuration ID
+        description: Exact entitlement description
+        description_contains: Substring of the entitlement description
+        refresh: Force a re-sync of the index before the query
+    Returns:
+        Dictionary containing the number of matches and the matching entitlements.
+    """
+    logging.debug("--> Querying FortiFlex entitlements ...")
+
+    if refresh:
+        await entitlement_index.refresh(access_token, force=True)
+    else:
+        await entitlement_index.ensure_fresh(access_token)
+    entitlements = entitlement_index.query(status, config_id, description, description_contains)
+    return {"count": len(entitlements), "entitlements": to_dicts(entitlements)}
+
+@mcp.tool(description='Re-sync the local FortiFlex entitlements index from the API.')
+@instrumented
+async def entitlements_index_refresh(access_token
+) -> Dict[str, Any]:
+    """
+    Fetch entitlements/list and apply the differences to the local index.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+    Returns:
+        Dictionary with the index size, per-status counts and how many records changed.
+    """
+    logging.debug("--> Refreshing the FortiFlex entitlements index ...")
+
+    return await entitlement_index.refresh(access_token, force=True)
+
+@mcp.tool(description='Summarize FortiFlex entitlements server-side: counts and point usage grouped by configId, productType, status, startMonth and/or endMonth, optionally within a date range.')
+@instrumented
+async def entitlements_aggregate(access_token, group_by: Optional[List[str]] = None, start_date: str = "",
+                                 end_date: str = "", include_points: bool = False, use_snapshot: bool = True,
+                                 refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Aggregate the account's entitlements and return only the summary.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        group_by: Keys to group by, any of configId, productType, status, startMonth, endMonth
+                  (default: ["productType", "status"])
+        start_date: Only entitlements active on or after this date (YYYY-MM-DD)
+        end_date: Only entitlements active on or before this date (YYYY-MM-DD)
+        include_points: Also sum the points consumed between start_date and end_date (entitlements/points)
+        use_snapshot: Read entitlements from the local index instead of fetching the full list
+        refresh: Re-sync the local index / bypass the cache before aggregating
+    Returns:
+        Dictionary with the totals and one row per group, largest first.
+    """
+    logging.debug("--> Aggregating FortiFlex entitlements ...")
+
+    group_by = list(group_by or ["productType", "status"])
+    unknown = [key for key in group_by if key not in AGGREGATE_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown group_by keys {unknown}; use any of {', '.join(AGGREGATE_KEYS)}")
+    start_date = _iso_date("start_date", start_date)
+    end_date = _iso_date("end_date", end_date)
+    if start_date and end_date and start_date > end_date:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+
+    if use_snapshot:
+        if refresh:
+            await entitlement_index.refresh(access_token, force=True)
+        else:
+            await entitlement_index.ensure_fresh(access_token)
+        records = entitlement_index.query()
+        source = {"source": "snapshot", "synced_at": entitlement_index.synced_at}
+    else:
+        response = await _fetch_entitlements(access_token, program_sn, account_id, refresh)
+        records = entitlement_records(response.get("entitlements") or [])
+        source = {"source": "live"}
+
+    config_types: Dict[str, str] = {}
+    if "productType" in group_by:
+        from ..catalog import PRODUCT_TYPE_NAMES
+        from .configs import _fetch_configs
+        configs = await _fetch_configs(access_token, program_sn, refresh)
+        for config in configs.get("configs") or []:
+            type_id = (config.get("productType") or {}).get("id")
+            config_types[str(config.get("id"))] = PRODUCT_TYPE_NAMES.get(type_id, str(type_id))
+
+    points = None
+    if include_points:
+        points = await entitlement_points(access_token, start_date, end_date)
+
+    return {
+        "group_by": group_by,
+        "start_date": start_date or None,
+        "end_date": end_date or None,
+        **source,
+        **aggregate_entitlements(records, group_by, config_types, points, start_date, end_date),
+    }
+
+def _iso_date(name: str, value: str) -> str:
+    """Check an optional YYYY-MM-DD argument and return it in canonical form."""
+    if not value:
+        return ""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format, got {value!r}") from None
+
+@mcp.tool(description='Regenerate the VM token license token from FortiFlex for a given serial number.')
+@instrumented
+async def entitlements_vm_token(access_token, serial_number
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex API to regenerate and retrieve a VM license Token.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_number: Serial number of the VM to filter entitlements
+    Returns:
+        Dictionary containing the VM license token.    
+    """
+    logging.debug("--> FortiFlex VM License Token ...")
+
+    uri = FORTIFLEX_API_BASE_URI + "entitlements/vm/token"
+    headers = COMMON_HEADERS.copy()
+
+    body = {
+        "serialNumber": serial_number,
+    }
+    
+    response = await make_request(uri, body, headers, access_token=access_token)
+    entitlements_changed()
+    return response
+
+@mcp.tool(description='Reactivate the VM token license token from FortiFlex for a given serial number.')
+@instrumented
+async def entitlements_reactivate(access_token, serial_number
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex API to reactivate VM license Token for a given serial number.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_number: Serial number of the VM to filter entitlements
+    Returns:
+        Dictionary containing the VM license token.    
+    """
+    logging.debug("--> Reactivate the FortiFlex VM License ...")
+
+    uri = FORTIFLEX_API_BASE_URI + "entitlements/reactivate"
+    headers = COMMON_HEADERS.copy()
+    body = {
+        "serialNumber": serial_number,
+    }
+    response = await make_request(uri, body, headers, access_token=access_token)
+    entitlements_changed()
+    return response
+
+@mcp.tool(description='Stop the VM token license token from FortiFlex for a given serial number.')
+@instrumented
+async def entitlements_stop(access_token, serial_number
+) -> Dict[str, Any]:
+    """
+    Perform POST request for the FortiFlex API to stop VM license Token for a given serial number.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token)
+        serial_number: Serial number of the VM to filter entitlements
+    Returns:
+        Dictionary containing the VM license token.    
+    """
+    logging.debug("--> Stopping the FortiFlex VM License ...")
+
+    uri = FORTIFLEX_API_BASE_URI + "entitlements/stop"
+    headers = COMMON_HEADERS.copy()
+
+    body = {
+        "serialNumber": serial_number,
+    }
+    response = await make_request(uri, body, headers, access_token=access_token)
+    entitlements_changed()
+    return response
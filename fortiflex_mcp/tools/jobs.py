@@ -0,0 +1,112 @@
+"""
+Background job tools: queue lifecycle operations durably and poll them.
+"""
+import logging
+from typing import Optional, Dict, Any, List
+
+from ..app import mcp
+from ..jobs import OPERATIONS, job_queue
+from ..metrics import instrumented
+from .batch import _resolve_serials
+
+
+@mcp.tool(description='Queue a long-running FortiFlex operation (stop, reactivate, vm_token or update_config) as a durable background job and return its job ID immediately. The job survives server restarts; poll it with job_status.')
+@instrumented
+async def job_submit(access_token, operation: str, serial_numbers: Optional[List[str]] = None, config_id: str = "",
+                     status: str = "", configs: Optional[List[Dict[str, Any]]] = None, idempotency_key: str = "",
+                     validate: bool = True
+) -> Dict[str, Any]:
+    """
+    Store one request per entitlement or configuration in the local job
+    queue; the workers send them in the background, at most
+    FORTIFLEX_JOBS_WORKERS at a time across all jobs.
+
+    Args:
+        access_token: Bearer token for authentication (empty to use the cached server token). It is
+                      kept in memory only, so only this process sends the job; if it stops, the unsent
+                      items fail instead of running under the server credentials.
+        operation: One of stop, reactivate, vm_token or update_config
+        serial_numbers: Serial numbers to act on (stop, reactivate, vm_token)
+        config_id: Act on every entitlement of this configuration (used when serial_numbers is empty)
+        status: Act on every entitlement with this status (used when serial_numbers is empty)
+        configs: For update_config, a list of {"id", "name", "parameters"} objects
+        idempotency_key: Submitting the same key again returns the existing job instead of a new one
+        validate: For update_config, check the parameters against the local registry first
+    Returns:
+        Dictionary with the job ID, status and item counts.
+    """
+    logging.debug("--> Submitting a FortiFlex job ...")
+
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation {operation!r}; use one of {', '.join(OPERATIONS)}")
+    if operation == "update_config":
+        if not configs:
+            raise ValueError("update_config jobs need a configs list of {\"id\", \"name\", \"parameters\"}")
+        payloads = []
+        for i, config in enumerate(configs):
+            if config.get("id") in (None, "") or not config.get("name") or config.get("parameters") is None:
+                raise ValueError(f"configs[{i}]: each config needs an 'id', a 'name' and 'parameters'")
+            payloads.append({"id": config["id"], "name": config["name"], "parameters": config["parameters"]})
+        if validate:
+            from ..catalog import validate_config_parameters
+            errors = [f"configs[{i}]: {error}" for i, payload in enumerate(payloads)
+                      for error in validate_config_parameters(payload["parameters"])]
+            if errors:
+                raise ValueError("Invalid configuration parameters: " + "; ".join(errors))
+    else:
+        serials = await _resolve_serials(access_token, serial_numbers, config_id, status)
+        payloads = [{"serialNumber": serial} for serial in serials]
+
+    return await job_queue.submit(operation, payloads, idempotency_key=idempotency_key, access_token=access_token)
+
+@mcp.tool(description='Show the progress of a background FortiFlex job: status, item counts and the failed (or all) items with their responses.')
+@instrumented
+async def job_status(job_id: str, items: str = "failed", limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Read a job and its item counts from the job queue.
+
+    Args:
+        job_id: ID returned by job_submit
+        items: Which items to include: failed (default), succeeded, pending, cancelled, all, or empty for none
+        limit: Maximum number of items to include
+    Returns:
+        Dictionary with the job status, counts per item status and the selected items.
+    """
+    logging.debug("--> FortiFlex job status ...")
+
+    return await job_queue.status(job_id, items=items, limit=limit)
+
+@mcp.tool(description='Cancel a background FortiFlex job: its pending items are not sent; items already in flight still finish.')
+@instrumented
+async def job_cancel(job_id: str
+) -> Dict[str, Any]:
+    """
+    Cancel the items of a job that have not been sent yet.
+
+    Args:
+        job_id: ID returned by job_submit
+    Returns:
+        Dictionary with the job status, counts and the number of items cancelled.
+    """
+    logging.debug("--> Cancelling a FortiFlex job ...")
+
+    return await job_queue.cancel(job_id)
+
+@mcp.tool(description='List recent background FortiFlex jobs, newest first, optionally filtered by status (queued, running, completed, cancelled).')
+@instrumented
+async def job_list(status: str = "", limit: int = 20
+) -> Dict[str, Any]:
+    """
+    List the jobs kept in the job queue.
+
+    Args:
+        status: Only jobs with this status
+        limit: Maximum number of jobs to return
+    Returns:
+        Dictionary with the jobs and their item counts.
+    """
+    logging.debug("--> Listing FortiFlex jobs ...")
+
+    jobs = await job_queue.list_jobs(status=status.lower(), limit=limit)
+    return {"jobs": jobs, "count": len(jobs)}
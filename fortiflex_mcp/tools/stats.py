@@ -0,0 +1,88 @@
+"""
+Request, cache and server statistics, also served at /metrics in HTTP/SSE mode.
+"""
+import logging
+from typing import Dict, Any
+
+from ..app import mcp
+from ..auth import token_manager
+from ..cache import response_cache, page_snapshots
+from ..index import entitlement_index
+from ..jobs import job_queue
+from ..metrics import metrics, instrumented
+from ..settings import (AUTH_RATE_LIMIT, AUTH_RATE_BURST, API_RATE_LIMIT, API_RATE_BURST, RETRY_MAX_ATTEMPTS,
+                        RETRY_NON_IDEMPOTENT)
+from ..snapshots import snapshot_store
+from ..tenants import tenant_registry
+from ..transport import request_counters
+
+
+@mcp.tool(description='Show client-side rate limiting and retry counters for FortiFlex API calls.')
+@instrumented
+async def request_stats() -> Dict[str, Any]:
+    """
+    Return the counters kept by the shared request path.
+
+    Returns:
+        Dictionary with request, throttle, retry and error counters, and the configured limits.
+    """
+    logging.debug("--> Request statistics ...")
+
+    return {
+        **request_counters,
+        "limits": {
+            "auth": {"rate": AUTH_RATE_LIMIT, "burst": AUTH_RATE_BURST},
+            "api": {"rate": API_RATE_LIMIT, "burst": API_RATE_BURST},
+            "max_retries": RETRY_MAX_ATTEMPTS,
+            "retry_non_idempotent": RETRY_NON_IDEMPOTENT,
+        },
+    }
+
+
+@mcp.tool(description='Show hit/miss statistics of the FortiFlex response cache.')
+@instrumented
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Return the response cache counters.
+
+    Returns:
+        Dictionary with hits, misses, coalesced requests, evictions, invalidations, size and TTLs.
+    """
+    logging.debug("--> Cache statistics ...")
+
+    return response_cache.summary()
+
+
+@mcp.tool(description='Show server performance metrics: per-tool and per-upstream-endpoint latency, status codes, bytes, retries, cache and token state.')
+@instrumented
+async def server_stats() -> Dict[str, Any]:
+    """
+    Return a snapshot of the server metrics. The same data is served in
+    Prometheus format at /metrics in HTTP/SSE mode.
+
+    Returns:
+        Dictionary with per-tool and per-endpoint metrics, request counters, cache, index and snapshot state.
+    """
+    logging.debug("--> Server statistics ...")
+
+    return {
+        **metrics.snapshot(),
+        "requests": dict(request_counters),
+        "cache": response_cache.summary(),
+        "page_snapshots": page_snapshots.summary(),
+        "index": entitlement_index.summary(),
+        "snapshots": snapshot_store.summary(),
+        "jobs": job_queue.summary(),
+        "tenants": tenant_registry.summary(),
+        "token": {"cached": token_manager.access_token is not None,
+                  "expires_in": token_manager.token_response()["expires_in"]},
+    }
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request):
+    from starlette.responses import PlainTextResponse
+    cache = {name: value for name, value in response_cache.summary().items() if name != "ttls"}
+    body = metrics.render_prometheus({"client": request_counters, "cache": cache,
+                                      "index": {"entitlements": len(entitlement_index)}})
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
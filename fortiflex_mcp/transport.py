@@ -0,0 +1,478 @@
+"""
+Pooled HTTP clients and the shared request path to FortiCare and FortiFlex:
+client-side rate limiting, retries, 401 handling and streaming JSON parsing.
+"""
+import asyncio
+import codecs
+import json
+import logging
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import httpx
+
+from . import auth, tenants
+from .metrics import metrics
+from .settings import (
+    COMMON_HEADERS, FORTIFLEX_API_BASE_URI, FORTICARE_AUTH_URI, timeout,
+    POOL_MAX_CONNECTIONS, POOL_MAX_CONNECTIONS_PER_HOST, POOL_MAX_KEEPALIVE, POOL_KEEPALIVE_EXPIRY, HTTP2_ENABLED,
+    AUTH_RATE_LIMIT, AUTH_RATE_BURST, API_RATE_LIMIT, API_RATE_BURST,
+    RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, RETRY_NON_IDEMPOTENT,
+    RETRY_STATUS_CODES, IDEMPOTENT_ENDPOINTS,
+)
+
+
+def endpoint_label(uri: str) -> str:
+    if uri.startswith(FORTIFLEX_API_BASE_URI):
+        return uri[len(FORTIFLEX_API_BASE_URI):]
+    if uri.startswith(FORTICARE_AUTH_URI):
+        return "oauth/token"
+    return httpx.URL(uri).path
+
+
+class RequestTrace:
+    """httpx trace hook that captures connection setup and server wait times of one request."""
+
+    def __init__(self):
+        self.events: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.events[event_name.split(".", 1)[1] if event_name.startswith(("http11.", "http2.")) else event_name] = \
+            time.perf_counter()
+
+    def connect_seconds(self) -> Optional[float]:
+        started = self.events.get("connection.connect_tcp.started")
+        finished = self.events.get("connection.start_tls.complete") or self.events.get("connection.connect_tcp.complete")
+        return finished - started if started and finished else None
+
+    def server_seconds(self) -> Optional[float]:
+        sent = self.events.get("send_request_body.complete") or self.events.get("send_request_headers.complete")
+        received = self.events.get("receive_response_headers.complete")
+        return received - sent if sent and received else None
+
+
+_http_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}     # (tenant, host) -> client
+_http_clients_lock = threading.Lock()       # pools may be created from the start-up thread
+_request_slots: Optional[asyncio.Semaphore] = None
+_startup_task: Optional[asyncio.Future] = None
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("FORTIFLEX_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def get_client(uri: str) -> httpx.AsyncClient:
+    """
+    Return the pooled client for the host of the given URI, creating it on
+    first use. Each tenant other than the default one has its own pools.
+    """
+    tenant = tenants.current_tenant.get()
+    key = (tenant.name if tenant is not None else "", httpx.URL(uri).host)
+    client = _http_clients.get(key)
+    if client is None or client.is_closed:
+        with _http_clients_lock:
+            client = _http_clients.get(key)
+            if client is None or client.is_closed:
+                limits = httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                )
+                client = httpx.AsyncClient(timeout=timeout, limits=limits, http2=_http2_available())
+                _http_clients[key] = client
+    return client
+
+
+def _create_http_clients() -> None:
+    for uri in (FORTICARE_AUTH_URI, FORTIFLEX_API_BASE_URI):
+        get_client(uri)
+
+
+async def startup_http_clients(wait: bool = True) -> None:
+    """
+    Create the shared connection pools for the FortiCare auth host and the FortiFlex API host.
+
+    Loading the CA bundle of each pool is the slowest step of start-up; with
+    wait=False it runs in a worker thread while the server starts answering,
+    and a request that arrives first simply creates its pool itself.
+    """
+    global _request_slots, _startup_task
+    _request_slots = asyncio.Semaphore(POOL_MAX_CONNECTIONS)
+    if wait:
+        _create_http_clients()
+    else:
+        _startup_task = asyncio.ensure_future(asyncio.to_thread(_create_http_clients))
+
+
+async def shutdown_http_clients() -> None:
+    """Close every pooled client and release its connections."""
+    global _startup_task
+    if _startup_task is not None:
+        await asyncio.gather(_startup_task, return_exceptions=True)
+        _startup_task = None
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter shared by every request to one endpoint family."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+auth_rate_limiter = TokenBucket(AUTH_RATE_LIMIT, AUTH_RATE_BURST)
+api_rate_limiter = TokenBucket(API_RATE_LIMIT, API_RATE_BURST)
+
+request_counters: Dict[str, Any] = {
+    "requests": 0,                  # HTTP attempts sent upstream
+    "throttled": 0,                 # attempts delayed by the client-side rate limiter
+    "throttle_wait_seconds": 0.0,
+    "retried": 0,                   # attempts that were retries
+    "rate_limited_responses": 0,    # 429 responses received
+    "server_errors": 0,             # 5xx responses received
+    "transport_errors": 0,          # connection and timeout errors
+}
+
+# Errors raised before the request reached the server, so they are safe to retry for any endpoint.
+_UNSENT_REQUEST_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _is_idempotent(uri: str) -> bool:
+    if uri.startswith(FORTICARE_AUTH_URI) or RETRY_NON_IDEMPOTENT:
+        return True
+    return uri[len(FORTIFLEX_API_BASE_URI):] in IDEMPOTENT_ENDPOINTS
+
+
+def _backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+async def send(client: httpx.AsyncClient, uri: str, body: Dict[str, Any], headers: Dict[str, str],
+                stream: bool = False) -> httpx.Response:
+    """
+    POST through the rate limiter, retrying 429s, and 5xx/transport errors on idempotent endpoints.
+    With stream=True the body is not read and the caller must close the returned response.
+    """
+    global _request_slots
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(POOL_MAX_CONNECTIONS)
+    tenant = tenants.current_tenant.get()
+    if uri.startswith(FORTICARE_AUTH_URI):
+        limiter = auth_rate_limiter
+    else:
+        limiter = tenant.api_rate_limiter if tenant is not None else api_rate_limiter
+    idempotent = _is_idempotent(uri)
+    endpoint = endpoint_label(uri)
+    attempt = 0
+    while True:
+        waited = await limiter.acquire()
+        if waited:
+            request_counters["throttled"] += 1
+            request_counters["throttle_wait_seconds"] += waited
+        request_counters["requests"] += 1
+        trace = RequestTrace()
+        started = time.perf_counter()
+        metrics.upstream_in_flight[endpoint] = metrics.upstream_in_flight.get(endpoint, 0) + 1
+        try:
+            try:
+                async with _request_slots:
+                    request = client.build_request("POST", uri, json=body, headers=headers,
+                                                   extensions={"trace": trace})
+                    response = await client.send(request, stream=stream)
+            finally:
+                # Also on cancellation (client cancel, job_queue.close(), a cancelled watch).
+                metrics.upstream_in_flight[endpoint] -= 1
+        except httpx.TransportError as e:
+            metrics.observe_upstream(endpoint, type(e).__name__, time.perf_counter() - started,
+                                     trace.connect_seconds(), None)
+            request_counters["transport_errors"] += 1
+            if attempt >= RETRY_MAX_ATTEMPTS or not (idempotent or isinstance(e, _UNSENT_REQUEST_ERRORS)):
+                raise
+            delay = _backoff_delay(attempt)
+            reason = type(e).__name__
+        else:
+            metrics.observe_upstream(endpoint, str(response.status_code), time.perf_counter() - started,
+                                     trace.connect_seconds(), trace.server_seconds())
+            if not stream:
+                metrics.add_bytes(endpoint, len(response.content))
+            if response.status_code == 429:
+                # The request was rejected without being processed, so it is safe to retry anywhere.
+                request_counters["rate_limited_responses"] += 1
+            elif response.status_code in RETRY_STATUS_CODES:
+                request_counters["server_errors"] += 1
+                if not idempotent:
+                    return response
+            else:
+                return response
+            if attempt >= RETRY_MAX_ATTEMPTS:
+                return response
+            retry_after = _retry_after(response)
+            if retry_after is not None and retry_after > RETRY_BACKOFF_MAX:
+                return response
+            delay = max(retry_after or 0.0, _backoff_delay(attempt))
+            reason = f"HTTP {response.status_code}"
+            await response.aclose()
+        attempt += 1
+        request_counters["retried"] += 1
+        metrics.add_retry(endpoint)
+        logging.warning(f"{reason} from {uri}, retry {attempt}/{RETRY_MAX_ATTEMPTS} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+
+def describe_error(error: Exception) -> str:
+    """A one-line description of a failed request for per-item batch and job results."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}: {error.response.text}"
+    return str(error) or type(error).__name__
+
+
+async def make_request(
+    uri: str, 
+    body: Dict[str, Any], 
+    headers: Dict[str, str],
+    access_token: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Helper function to make the actual HTTP request over the shared connection pool.
+
+    When access_token is not None the request is authenticated: an empty token
+    is replaced by the cached one from token_manager, and a 401 response is
+    then retried once with a freshly issued token. A 401 for a token passed
+    by the caller is raised, so the request never runs under the server's
+    own credentials instead.
+    """
+    client = get_client(uri)
+    headers = dict(headers)
+    try:
+        cached_token = access_token == ""
+        if access_token is not None:
+            access_token = access_token or await auth.timed_get_token()
+            headers["Authorization"] = f"Bearer {access_token}"
+        response = await send(client, uri, body, headers)
+        if response.status_code == 401 and cached_token:
+            logging.debug("--> Token rejected, retrying with a new token...")
+            token_manager = auth.active_token_manager()
+            token_manager.invalidate(access_token)
+            headers["Authorization"] = f"Bearer {await token_manager.get_token()}"
+            response = await send(client, uri, body, headers)
+        response.raise_for_status()
+        return response.json()
+    
+    except httpx.HTTPStatusError as e:
+        logging.error(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
+        raise
+    except httpx.RequestError as e:
+        logging.error(f"Request error occurred: {str(e)}")
+        raise
+    except Exception as e:
+        logging.error(f"Unexpected error occurred: {str(e)}")
+        raise
+
+
+_JSON_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_JSON_STRING_END = re.compile(r'["\\]')
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+_JSON_SCALAR_END = re.compile(r'[\s,\]]')
+
+
+class JsonArrayStream:
+    """
+    Incremental parser that yields the items of one top-level array of a JSON
+    object, e.g. {"entitlements": [...]}, as bytes arrive.
+
+    The bytes before the array are scanned for the key; inside the array each
+    complete item is decoded by the C JSON decoder straight from the buffer,
+    and an item cut off by the end of a chunk waits for the next one. Only
+    the bytes of the item being parsed are buffered, so memory stays flat
+    however large the array is. Scalar array items are skipped.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.done = False
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._in_array = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Consume a chunk and return the items it completed."""
+        buf = self._buffer + self._text.decode(chunk)
+        pos = self._pos
+        items = []
+        while not self.done:
+            if self._in_array:
+                pos = _JSON_SEPARATORS.match(buf, pos).end()
+                if pos >= len(buf):
+                    break
+                char = buf[pos]
+                if char == "]":
+                    pos += 1
+                    self.done = True
+                    break
+                if char not in '{["':
+                    # Numbers, true, false and null are skipped without decoding them: a
+                    # number cut at "1." or "1e" is not valid JSON until the rest arrives.
+                    match = _JSON_SCALAR_END.search(buf, pos)
+                    if match is None:
+                        break                        # the scalar continues in the next chunk
+                    pos = match.start()
+                    continue
+                try:
+                    item, end = self._decoder.raw_decode(buf, pos)
+                except ValueError:                   # the item continues in the next chunk
+                    break
+                if char in "{[":
+                    items.append(item)
+                pos = end
+                continue
+            if self._in_string:
+                match = _JSON_STRING_END.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if buf[match.start()] == "\\":         # skip the escaped character
+                    if match.start() + 1 >= len(buf):
+                        pos = match.start()
+                        break
+                    pos = match.start() + 2
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._depth == 1:
+                    self._last_string = buf[self._string_start:match.start()]
+                continue
+            match = _JSON_STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            char = buf[match.start()]
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and char == "[" and self._last_string == self.key:
+                    self._in_array = True
+            else:
+                self._depth -= 1
+
+        # Drop everything before the oldest character still needed.
+        cut = self._string_start if self._in_string and not self._in_array else pos
+        self._buffer = buf[cut:]
+        self._pos = pos - cut
+        if self._in_string:
+            self._string_start -= cut
+        return items
+
+
+async def stream_json_items(uri: str, body: Dict[str, Any], key: str, access_token: str = ""):
+    """
+    Authenticated POST whose response items under key are yielded one by one
+    while the body is still downloading. Closing the generator early closes
+    the response without reading the rest of it. As in make_request, only a
+    401 for the cached server token is retried with a new one.
+    """
+    client = get_client(uri)
+    headers = COMMON_HEADERS.copy()
+    cached_token = not access_token
+    access_token = access_token or await auth.timed_get_token()
+    headers["Authorization"] = f"Bearer {access_token}"
+    response = await send(client, uri, body, headers, stream=True)
+    try:
+        if response.status_code == 401 and cached_token:
+            logging.debug("--> Token rejected, retrying with a new token...")
+            await response.aclose()
+            token_manager = auth.active_token_manager()
+            token_manager.invalidate(access_token)
+            headers["Authorization"] = f"Bearer {await token_manager.get_token()}"
+            response = await send(client, uri, body, headers, stream=True)
+        if response.is_error:
+            await response.aread()
+            logging.error(f"HTTP error occurred: {response.status_code} - {response.text}")
+            response.raise_for_status()
+        parser = JsonArrayStream(key)
+        endpoint = endpoint_label(uri)
+        head = b""                                  # start of the body, to report an error response
+        async for chunk in response.aiter_bytes():
+            metrics.add_bytes(endpoint, len(chunk))
+            if len(head) < _ERROR_BODY_BYTES:
+                head += chunk[:_ERROR_BODY_BYTES - len(head)]
+            for item in parser.feed(chunk):
+                yield item
+            if parser.done:
+                break
+        if not parser.done:
+            raise RuntimeError(f"{endpoint} response has no complete {key!r} list: {_response_message(head)}")
+    finally:
+        await response.aclose()
+
+
+_ERROR_BODY_BYTES = 4096
+
+
+def _response_message(head: bytes) -> str:
+    """The message of a FortiFlex error body such as {"status": -1, "message": "..."}, or the body itself."""
+    try:
+        document = json.loads(head)
+    except ValueError:
+        document = None
+    if isinstance(document, dict) and document.get("message"):
+        return str(document["message"])
+    text = head.decode("utf-8", "replace").strip()
+    return text[:200] or "empty body"